@@ -0,0 +1,159 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from copy import copy
+from threading import Lock, Thread
+from engine import label_tree, random_spanning_tree
+
+# State of a worker process, set once by init_worker
+worker = {}
+
+def init_worker(ptr, adj, root, graph, objective) -> None:
+    worker.update(ptr=ptr, adj=adj, root=root, graph=graph, objective=objective,
+        rows=np.repeat(np.arange(len(ptr) - 1), np.diff(ptr)))
+
+def solver_copy(graph: "Graph") -> "Graph":
+    '''
+    Copy of the graph with only what GSST_L needs, cheap to ship to other processes.
+    '''
+    graph, original = copy(graph), graph
+    graph.g = original.g.copy()
+    for attr in ['bg', 't', 'B']:
+        graph.__dict__.pop(attr, None)
+    return graph
+
+def count_guards(graph: "Graph", parent, order, deadline: float=None) -> int:
+    '''
+    Runs GSST_L on the graph with the given spanning tree and returns the number of guards it needed,
+    None if it did not finish, e.g. because the deadline was reached. The spanning tree of the graph is replaced.
+    '''
+    from gsst import GSST_L
+    graph.set_spanning_tree(parent, order)
+    max_seconds = None if deadline is None else max(0, deadline - time.time())
+    result = GSST_L(graph=graph).search(max_seconds=max_seconds)
+    return result.guards if result.completed else None
+
+def sample(seed, count: int, deadline: float) -> tuple[int, tuple]:
+    '''
+    Samples and labels up to count trees before the deadline.
+    Returns the number of trees evaluated and the best (score, mu, guards, parent, order) among them.
+    '''
+    rng = np.random.default_rng(seed)
+    best = None
+    n = 0
+    while n < count and time.time() < deadline:
+        parent, order = random_spanning_tree(worker['ptr'], worker['adj'], worker['root'], rng, worker['rows'])
+        _, mu = label_tree(parent, order)
+        n += 1
+        if worker['objective'] == 'searchers':
+            score, guards = (mu,), None
+        else:
+            # Guards are only counted for trees that can still beat the best one
+            if best is not None and mu >= best[0][0]:
+                continue
+            guards = count_guards(worker['graph'], parent, order, deadline)
+            if guards is None:
+                continue
+            score = (mu + guards, mu)
+        if best is None or score < best[0]:
+            best = (score, mu, guards, parent, order)
+    return n, best
+
+class AnytimeSearch:
+    def __init__(self, graph: "Graph", budget: float, objective='searchers', workers: int=None, batch: int=16, seed=None) -> None:
+        '''
+        Samples and labels random spanning trees in worker processes until the time budget runs out,
+        keeping the tree with the fewest searchers (objective='searchers') or the fewest
+        searchers plus GSST_L guards (objective='robots').
+        The best tree so far can be read at any time, and applied to the graph with apply().
+        Attributes:
+        - budget:       Time budget in seconds
+        - workers:      Number of worker processes, None for one per core, 0 to sample in this process
+        - batch:        Number of trees sampled per task
+        - best:         (score, mu, guards, parent, order) of the best tree so far, guards is None for 'searchers'
+        - evaluated:    Number of trees evaluated so far
+        - improvements: (seconds since start, mu, guards) every time a better tree was found
+        '''
+        if objective not in ['searchers', 'robots']:
+            raise ValueError(f'Unknown objective {objective}')
+        self.graph = graph
+        self.budget = budget
+        self.objective = objective
+        self.workers = workers
+        self.batch = batch
+        self.seeds = np.random.SeedSequence(seed)
+        self.best = None
+        self.evaluated = 0
+        self.improvements = []
+        self.lock = Lock()
+        self.stopped = False
+        self.thread = None
+
+    def worker_args(self) -> tuple:
+        nodes, ptr, adj = self.graph.adjacency()
+        graph = solver_copy(self.graph) if self.objective == 'robots' else None
+        return ptr, adj, nodes.index('sta'), graph, self.objective
+
+    def update(self, evaluated: int, result: tuple, started: float) -> None:
+        with self.lock:
+            self.evaluated += evaluated
+            if result is not None and (self.best is None or result[0] < self.best[0]):
+                self.best = result
+                self.improvements.append((time.time() - started, result[1], result[2]))
+
+    def run(self) -> "AnytimeSearch":
+        '''
+        Searches until the budget runs out or stop() is called.
+        '''
+        started = time.time()
+        deadline = started + self.budget
+        args = self.worker_args()
+
+        if self.workers == 0:
+            init_worker(*args)
+            while not self.stopped and time.time() < deadline:
+                self.update(*sample(self.seeds.spawn(1)[0], self.batch, deadline), started)
+            return self
+
+        with ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=args) as pool:
+            workers = self.workers or os.cpu_count()
+            pending = {pool.submit(sample, seed, self.batch, deadline) for seed in self.seeds.spawn(workers)}
+            while pending:
+                done, pending = wait(pending, timeout=max(0, deadline - time.time()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.update(*future.result(), started)
+                if self.stopped or time.time() >= deadline:
+                    # Running tasks stop by themselves at the deadline
+                    for future in pending:
+                        future.cancel()
+                    for future in wait(pending).done:
+                        if not future.cancelled():
+                            self.update(*future.result(), started)
+                    break
+                for seed in self.seeds.spawn(len(done)):
+                    pending.add(pool.submit(sample, seed, self.batch, deadline))
+        return self
+
+    def start(self) -> "AnytimeSearch":
+        '''
+        Runs the search in a background thread, best can be read in the meantime.
+        '''
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped = True
+        if self.thread is not None:
+            self.thread.join()
+
+    def apply(self) -> "Graph":
+        '''
+        Sets the best tree so far as the spanning tree of the graph.
+        '''
+        if self.best is None:
+            raise ValueError("No spanning tree evaluated yet")
+        _, _, _, parent, order = self.best
+        self.graph.set_spanning_tree(parent, order)
+        return self.graph
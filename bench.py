@@ -0,0 +1,160 @@
+'''
+Benchmarks of the hot paths: graph generation, spanning tree generation, labeling, the GSST and GSST_L searches
+and frame rendering, over graph sizes from 10 to 10^5 nodes with fixed seeds.
+Time (best of the repeats) and peak memory (traced by tracemalloc in a separate run) are written as JSON,
+and compared against a baseline written by an earlier run.
+
+    python bench.py --output bench.json
+    python bench.py --sizes 10 100 1000 --baseline bench.json
+'''
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from experiments import make_graph
+from graph import Graph
+from gsst import GSST, GSST_L
+
+SIZES = [10, 100, 1000, 10**4, 10**5]
+BRANCHING = 3
+FRAMES = 10 # frames rendered by the render benchmark
+MAX_SIZE = {'render': 10**4} # largest size every benchmark is run on, unbounded if not listed
+MIN_SECONDS = 1e-3 # faster runs are too noisy to be flagged as regressions
+
+def bench_graph(n: int, tree=True) -> Graph:
+    '''
+    Random graph of the benchmarks, drawn from the numpy state seeded by run_once.
+    '''
+    return make_graph('random', n, BRANCHING, None, tree)
+
+def search(cls, graph: Graph):
+    solver = cls(graph=graph)
+    solver.search()
+    return solver
+
+def label(tree: Graph) -> None:
+    tree.start = 0
+    tree.label()
+
+def render(solver) -> None:
+    from layout import layouts
+    from render import images
+    layouts.clear() # the layout is part of the cost of rendering a run
+    for _ in images(solver.history, range(min(FRAMES, solver.t + 1)), hold=False):
+        pass
+
+# name: (setup(n) returning the arguments, timed function)
+# GSST_R is not benchmarked, its can_move_searcher is not implemented
+BENCHMARKS = {
+    'random_graph':                  (lambda n: (n, BRANCHING), Graph.random_graph),
+    'generate_random_spanning_tree': (lambda n: (bench_graph(n, tree=False),), Graph.generate_random_spanning_tree),
+    'label':                         (lambda n: (Graph(list(bench_graph(n).t.g.to_undirected().edges())),), label),
+    'GSST.search':                   (lambda n: (GSST, bench_graph(n)), search),
+    'GSST_L.search':                 (lambda n: (GSST_L, bench_graph(n)), search),
+    'render':                        (lambda n: (search(GSST_L, bench_graph(n)),), render),
+}
+
+def run_once(name: str, n: int, seed: int, memory=False) -> tuple[float, int]:
+    '''
+    Runs a benchmark once on fresh inputs, returns the time taken and the peak traced memory if memory.
+    '''
+    np.random.seed(seed)
+    random.seed(seed)
+    setup, function = BENCHMARKS[name]
+    with contextlib.redirect_stdout(io.StringIO()):
+        args = setup(n)
+        if memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        function(*args)
+        seconds = time.perf_counter() - started
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return seconds, peak
+
+def run(names: list, sizes: list, repeat: int, seed: int, memory=True) -> list:
+    results = []
+    for name in names:
+        for n in sizes:
+            if n > MAX_SIZE.get(name, n):
+                continue
+            result = {'name': name, 'size': n}
+            try:
+                result['seconds'] = min(run_once(name, n, seed)[0] for _ in range(repeat))
+                if memory:
+                    result['peak_bytes'] = run_once(name, n, seed, memory=True)[1]
+            except Exception as e:
+                result['error'] = f'{type(e).__name__}: {e}'
+            results.append(result)
+            print(format_result(result), flush=True)
+    return results
+
+def format_result(result: dict) -> str:
+    if 'error' in result:
+        return f"{result['name']:32} {result['size']:>7}  {result['error']}"
+    line = f"{result['name']:32} {result['size']:>7} {result['seconds']:10.4f} s"
+    if 'peak_bytes' in result:
+        line += f" {result['peak_bytes'] / 2**20:10.1f} MiB"
+    return line
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    '''
+    Prints the time of every benchmark relative to the baseline, returns the ones slower by more than threshold.
+    '''
+    before = {(r['name'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = before.get((result['name'], result['size']))
+        if old is None or 'seconds' not in old or 'seconds' not in result:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        flag = ''
+        if ratio > threshold and result['seconds'] > MIN_SECONDS:
+            flag = 'REGRESSION'
+            regressions.append(result)
+        print(f"{result['name']:32} {result['size']:>7} {old['seconds']:10.4f} s -> {result['seconds']:10.4f} s  x{ratio:.2f} {flag}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS), help='benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc runs')
+    parser.add_argument('--output', help='JSON file the results are written to')
+    parser.add_argument('--baseline', help='JSON file of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio flagged as a regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.sizes, args.repeat, args.seed, memory=not args.no_memory)
+    report = {
+        'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+                 'seed': args.seed, 'repeat': args.repeat, 'date': time.strftime('%Y-%m-%d %H:%M:%S')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) over x{args.threshold}')
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,11 @@
+import logging
 import os
 from graph import Graph
 from gsst import GSST_L
+from treecache import TreeCache
 import sys
 
+logging.basicConfig(level=logging.INFO, format='%(message)s')
 test_graph_only = False
 idx = int(sys.argv[1])
 files = {
@@ -43,11 +46,13 @@ g.visualize(save=True, filename=fn+'_graph.png')
 if test_graph_only:
     exit()
 
-g.generate_random_spanning_tree()
+g.generate_random_spanning_tree(cache=TreeCache()) # the same tree every run while the map is unchanged
 g.offset = 0.4
 g.visualize(save=True, filename=fn+'_tree.png')
 
 gsst_l = GSST_L(graph=g, filename=fn+'/run')
-gsst_l.search(visualize=True)
+result = gsst_l.search(visualize=True)
+if not result.completed:
+    sys.exit(f'INTERRUPTED! {result}')
 print(f'COMPLETED!\nTime: {gsst_l.t}, Number of searchers: {gsst_l.num_searcher}, Number of guards: {gsst_l.number_of_guards}')
 gsst_l.visualize()
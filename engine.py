@@ -0,0 +1,240 @@
+import numpy as np
+from heapq import heapify, heappop, heappush
+
+def csr(g, nodes: list, index: dict, attr=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Builds the CSR adjacency of the networkx graph g over the given node order,
+    along with the given edge attribute if any. Neighbors keep the networkx order.
+    '''
+    ptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    adj, values = [], []
+    for i, n in enumerate(nodes):
+        if n in g:
+            for neighbor, data in g[n].items():
+                adj.append(index[neighbor])
+                if attr is not None:
+                    values.append(data[attr])
+        ptr[i+1] = len(adj)
+    adj = np.array(adj, dtype=np.int64)
+    values = np.array(values, dtype=np.int64) if attr is not None else None
+    return ptr, adj, values
+
+class Engine:
+    def __init__(self, graph: "Graph", tree: "Graph") -> None:
+        '''
+        Integer-indexed view of a graph and its labeled spanning tree.
+        Nodes are mapped to 0..N-1 once and adjacency is stored in CSR arrays,
+        keeping the neighbor order of the networkx graphs so that searches behave the same.
+        Attributes:
+        - nodes:        Node label of every index
+        - index:        Index of every node label
+        - sta:          Index of the starting node 'sta'
+        - g_ptr, g_adj: CSR adjacency of the graph, the neighbors of i are g_adj[g_ptr[i]:g_ptr[i+1]]
+        - t_ptr, t_adj: CSR adjacency of the (directed) spanning tree
+        - t_label:      Label of every tree edge, aligned with t_adj
+        - positive:     Heap of (label, edge) over the positive tree edges of every node, built on first use.
+                        Entries whose label changed since are dropped when they reach the top.
+        - negative:     Every tree edge of a node before this one has a label >= 0
+        '''
+        self.nodes = list(graph.g.nodes())
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        self.sta = self.index['sta']
+        self.g_ptr, self.g_adj, _ = csr(graph.g, self.nodes, self.index)
+        self.t_ptr, self.t_adj, self.t_label = csr(tree.g, self.nodes, self.index, 'label')
+        self.t_end = self.t_ptr[1:].tolist()
+        self.positive = [None] * len(self.nodes)
+        self.negative = self.t_ptr[:-1].tolist()
+
+    def degree(self) -> np.ndarray:
+        return np.diff(self.g_ptr)
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.t_ptr)
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.g_adj[self.g_ptr[i]:self.g_ptr[i+1]]
+
+    def children(self, i: int) -> np.ndarray:
+        return self.t_adj[self.t_ptr[i]:self.t_ptr[i+1]]
+
+    def next_edge(self, v: int) -> tuple[int, bool]:
+        '''
+        Tree edge a searcher at v takes: the one with the smallest positive label (the first one on ties),
+        otherwise the first one with a negative label. Returns the edge and whether its label is positive,
+        the edge is -1 if all labels are 0.
+        '''
+        labels = self.t_label
+        heap = self.positive[v]
+        if heap is None:
+            a = self.t_ptr[v].item()
+            heap = [(l, a + i) for i, l in enumerate(labels[a:self.t_end[v]].tolist()) if l > 0]
+            heapify(heap)
+            self.positive[v] = heap
+        while heap:
+            l, edge = heap[0]
+            if labels[edge] == l:
+                return edge, True
+            heappop(heap)
+
+        i, end = self.negative[v], self.t_end[v]
+        while i < end and labels[i] >= 0:
+            i += 1
+        self.negative[v] = i
+        return (i if i < end else -1), False
+
+    def add_label(self, v: int, edge: int, delta: int) -> int:
+        '''
+        Adds delta to the label of the tree edge of v, returns the new label.
+        '''
+        l = self.t_label[edge].item() + delta
+        self.t_label[edge] = l
+        if l > 0:
+            if self.positive[v] is not None:
+                heappush(self.positive[v], (l, edge))
+        elif l < 0 and edge < self.negative[v]:
+            self.negative[v] = edge
+        return l
+
+    def edge(self, u: int, v: int) -> int:
+        '''
+        Position of the tree edge (u, v) in t_adj.
+        '''
+        a = self.t_ptr[u]
+        return int(a + np.flatnonzero(self.t_adj[a:self.t_ptr[u+1]] == v)[0])
+
+def label_tree(parent, order) -> tuple[np.ndarray, int]:
+    '''
+    Algorithm 2 in a single postorder pass.
+    The tree is given as a parent array (-1 at the root) and an order listing every parent
+    before its children, e.g. a BFS or DFS preorder.
+    Returns the label of the edge (parent[v], v) for every node v (0 at the root) and the label
+    the root would get, which is the number of searchers mu when the root is 'sta'.
+    '''
+    parent = np.asarray(parent, dtype=np.int64)
+    order = np.asarray(order, dtype=np.int64)
+    n = len(parent)
+    has_child = np.zeros(n, dtype=bool)
+    has_child[parent[parent >= 0]] = True
+
+    # Leaves are labeled 1, so count them per parent up front
+    leaves = ~has_child
+    ties = np.bincount(parent[leaves & (parent >= 0)], minlength=n)
+    best = (ties > 0).astype(np.int64).tolist() # largest label among the children
+    ties = ties.tolist()                        # number of children with that label
+    label = leaves.astype(np.int64)
+
+    inner = order[has_child[order]][::-1]
+    inner_labels = []
+    for v, p in zip(inner.tolist(), parent[inner].tolist()):
+        m = best[v]
+        l = m if ties[v] == 1 else m + 1
+        inner_labels.append(l)
+        if p >= 0:
+            if l > best[p]:
+                best[p] = l
+                ties[p] = 1
+            elif l == best[p]:
+                ties[p] += 1
+    label[inner] = inner_labels
+
+    root = order[0]
+    mu = int(label[root])
+    label[root] = 0
+    return label, mu
+
+def random_spanning_tree(ptr, adj, root: int, rng=np.random, rows=None) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Algorithm 4 in O(V+E): a random DFS from root over the CSR adjacency.
+    Picking the first unvisited neighbor of a random permutation of the neighbors
+    is the same as picking uniformly among the unvisited neighbors.
+    Returns the parent array (-1 at the root) and the DFS preorder.
+    '''
+    n = len(ptr) - 1
+    if rows is None:
+        rows = np.repeat(np.arange(n), np.diff(ptr))
+    # Shuffle the neighbors of every node at once
+    neighbors = adj[np.lexsort((rng.random(len(adj)), rows))].tolist()
+    ends = ptr[1:].tolist()
+    nxt = ptr[:-1].tolist() # next neighbor to try for every node
+
+    parent = [-1] * n
+    visited = [False] * n
+    visited[root] = True
+    order = [root]
+    stack = [root]
+    while stack:
+        v = stack[-1]
+        i, end = nxt[v], ends[v]
+        while i < end and visited[neighbors[i]]:
+            i += 1
+        if i == end:
+            nxt[v] = i
+            stack.pop()
+            continue
+        nxt[v] = i + 1
+        u = neighbors[i]
+        visited[u] = True
+        parent[u] = v
+        order.append(u)
+        stack.append(u)
+
+    if len(order) != n:
+        raise ValueError("Graph is not connected")
+    return np.array(parent, dtype=np.int64), np.array(order, dtype=np.int64)
+
+def random_spanning_trees(ptr, adj, root: int, count: int, rng=np.random) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Samples count random spanning trees, sharing the preprocessing of the adjacency.
+    Returns the parent arrays and the preorders, one row per tree.
+    '''
+    n = len(ptr) - 1
+    rows = np.repeat(np.arange(n), np.diff(ptr))
+    parents = np.empty((count, n), dtype=np.int64)
+    orders = np.empty((count, n), dtype=np.int64)
+    for k in range(count):
+        parents[k], orders[k] = random_spanning_tree(ptr, adj, root, rng, rows)
+    return parents, orders
+
+def reroot_labels(parent, order) -> np.ndarray:
+    '''
+    Number of searchers Algorithm 2 gives with every node of the tree as the starting node,
+    in two passes: labels of the subtrees below every node from label_tree, then in preorder
+    the label of the rest of the tree seen from every node.
+    The tree is given as for label_tree, the starting node being attached to 'sta'.
+    '''
+    parent = np.asarray(parent, dtype=np.int64)
+    order = np.asarray(order, dtype=np.int64)
+    n = len(parent)
+    down, _ = label_tree(parent, order)
+    down = down.tolist()
+
+    # Children of every node, in CSR form
+    children = np.argsort(parent, kind='stable')[1:].tolist() # the root is the only -1
+    ptr = np.concatenate([[0], np.cumsum(np.bincount(parent[parent >= 0], minlength=n))]).tolist()
+
+    up = [0] * n # label of the edge towards the parent, seen from the node
+    mu = [0] * n
+    for v in order.tolist():
+        # Largest and second largest distinct neighbor labels with their counts
+        m1 = c1 = m2 = c2 = 0
+        labels = [down[c] for c in children[ptr[v]:ptr[v+1]]]
+        if parent[v] >= 0:
+            labels.append(up[v])
+        for l in labels:
+            if l > m1:
+                m1, c1, m2, c2 = l, 1, m1, c1
+            elif l == m1:
+                c1 += 1
+            elif l > m2:
+                m2, c2 = l, 1
+            elif l == m2:
+                c2 += 1
+        mu[v] = 1 if m1 == 0 else (m1 if c1 == 1 else m1 + 1)
+        for c in children[ptr[v]:ptr[v+1]]:
+            if down[c] != m1:
+                up[c] = mu[v]
+            elif c1 > 1:
+                up[c] = m1 if c1 == 2 else m1 + 1
+            else:
+                up[c] = 1 if m2 == 0 else (m2 if c2 == 1 else m2 + 1)
+    return np.array(mu, dtype=np.int64)
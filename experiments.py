@@ -0,0 +1,153 @@
+'''
+Runs a sweep of search trials, every (family, size, k, seed, variant) combination, over a process pool
+without rendering. A row is appended to the CSV output as soon as its trial finishes,
+and running the same command again skips the trials already in the output, so an interrupted sweep resumes.
+
+    python experiments.py --sizes 100 1000 --seeds 100 --variants GSST GSST_L --output results.csv
+    python experiments.py --family grid --sizes 10000 --seeds 20 --workers 8 --output grid.csv
+'''
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import os
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+FAMILIES = ['random', 'grid', 'corridor']
+VARIANTS = ['GSST', 'GSST_L', 'GSST_R']
+COLUMNS = ['key', 'family', 'size', 'k', 'seed', 'variant', 'nodes', 'edges', 'searchers', 'guards', 'steps',
+           'moves', 'blocked', 'interrupted', 'seconds', 'history_bytes', 'peak_bytes', 'error']
+ROOM_SIZE = 3 # rooms of the corridor family are ROOM_SIZE x ROOM_SIZE grids
+
+def trial_key(family: str, size: int, k: float, seed: int, variant: str) -> str:
+    return f'{family}:{size}:{k:g}:{seed}:{variant}'
+
+def make_graph(family: str, size: int, k: float, seed: int, tree=True) -> "Graph":
+    '''
+    Graph of about size vertices of the given family, with its starting node and a random spanning tree if tree.
+    With seed None the graph and the tree are drawn from the global numpy state.
+    '''
+    from graph import Graph
+    from generators import corridor_edges, grid_edges
+    if family == 'random':
+        graph = Graph(Graph.random_graph(size, k, seed))
+    elif family == 'grid':
+        side = max(int(round(size ** 0.5)), 2)
+        edges, pos = grid_edges(side, side, seed=seed)
+        graph = Graph(edges, pos=pos)
+    elif family == 'corridor':
+        edges, pos = corridor_edges(max(size // (1 + ROOM_SIZE * ROOM_SIZE), 1), ROOM_SIZE, seed=seed)
+        graph = Graph(edges, pos=pos)
+    else:
+        raise ValueError(f'Unknown family {family}')
+    graph.add_sta()
+    if tree:
+        if seed is not None:
+            np.random.seed(seed)
+        graph.generate_random_spanning_tree()
+    return graph
+
+def run_trial(family: str, size: int, k: float, seed: int, variant: str, memory=False) -> dict:
+    '''
+    Runs one trial and returns its row, errors are reported in the row instead of raised.
+    '''
+    import gsst
+    from instrument import Instrumentation
+    row = {'key': trial_key(family, size, k, seed, variant), 'family': family, 'size': size, 'k': k,
+           'seed': seed, 'variant': variant, 'interrupted': False}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            graph = make_graph(family, size, k, seed)
+            row['nodes'] = graph.g.number_of_nodes()
+            row['edges'] = graph.g.number_of_edges()
+            random.seed(seed)
+            if memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            instruments = Instrumentation()
+            solver = getattr(gsst, variant)(graph=graph, instruments=instruments)
+            result = solver.search()
+            row['interrupted'] = not result.completed
+            row['seconds'] = time.perf_counter() - started
+            if memory:
+                row['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        row.update(searchers=result.searchers, guards=result.guards, steps=result.steps,
+                   moves=instruments.counters['moves'], blocked=instruments.counters['blocked'],
+                   history_bytes=solver.history.memory())
+    except Exception as e:
+        row['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return row
+
+def finished(path: str) -> set:
+    '''
+    Keys of the trials already in the output.
+    '''
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline='') as f:
+        return {row['key'] for row in csv.DictReader(f)}
+
+def sweep(trials: list, output: str, workers: int=None, memory=False) -> int:
+    '''
+    Runs the trials not yet in the output, appending their rows as they finish. Returns the number of trials run.
+    '''
+    done = finished(output)
+    todo = [trial for trial in trials if trial_key(*trial) not in done]
+    print(f'{len(trials)} trials, {len(trials) - len(todo)} already done, {len(todo)} to run', flush=True)
+    if not todo:
+        return 0
+
+    new = not os.path.exists(output) or os.path.getsize(output) == 0
+    with open(output, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        if new:
+            writer.writeheader()
+
+        def write(row: dict) -> None:
+            writer.writerow(row)
+            f.flush()
+            print(f"{row['key']:40} searchers={row.get('searchers')} guards={row.get('guards')} "
+                  f"steps={row.get('steps')} {row.get('error', '')}", flush=True)
+
+        if workers == 0:
+            for trial in todo:
+                write(run_trial(*trial, memory=memory))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                futures = [pool.submit(run_trial, *trial, memory=memory) for trial in todo]
+                for future in as_completed(futures):
+                    write(future.result())
+    return len(todo)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--family', nargs='+', choices=FAMILIES, default=['random'])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100])
+    parser.add_argument('--k', type=float, nargs='+', default=[3], help='branching factors of the random family')
+    parser.add_argument('--seeds', type=int, default=10, help='number of seeds, 0 to seeds-1')
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=['GSST_L'])
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, None for one per core, 0 to run in this process')
+    parser.add_argument('--memory', action='store_true', help='trace the peak memory of every trial (slower)')
+    parser.add_argument('--output', default='results.csv')
+    args = parser.parse_args(argv)
+
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    trials = []
+    for family, size, seed, variant in itertools.product(args.family, args.sizes, seeds, args.variants):
+        for k in (args.k if family == 'random' else [0]):
+            trials.append((family, size, k, seed, variant))
+    sweep(trials, args.output, args.workers, args.memory)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import numpy as np
+from engine import random_spanning_tree
+
+def rng_for(seed) -> np.random.Generator:
+    '''
+    Generator for the given seed, or drawn from the global numpy state if seed is None so that np.random.seed still applies.
+    '''
+    return np.random.default_rng(np.random.randint(2**31) if seed is None else seed)
+
+def random_edges(N: int, k: float, seed=None) -> list[tuple[int, int]]:
+    '''
+    Edge list of a connected graph with N vertices and branching factor (average degree) about k,
+    in O(N*k) time and memory: a random tree, every vertex after 0 being attached to a random earlier one
+    in a random order, plus random extra edges drawn uniformly among the other pairs.
+    '''
+    rng = rng_for(seed)
+    order = np.concatenate([[0], rng.permutation(np.arange(1, N))]).astype(np.int64)
+    parent = order[(rng.random(N - 1) * np.arange(1, N)).astype(np.int64)]
+    a, b = np.minimum(parent, order[1:]), np.maximum(parent, order[1:])
+    tree = a * N + b # pair (a, b) with a < b as a single key
+
+    pairs = N * (N - 1) // 2
+    extra = int(min(max(k * N // 2 - (N - 1), 0), pairs - (N - 1)))
+    if extra == 0:
+        keys = tree
+    elif pairs <= 4 * (N - 1 + extra):
+        # Dense graph, draw among all the pairs
+        rows, cols = np.triu_indices(N, 1)
+        others = np.setdiff1d(rows * N + cols, tree)
+        keys = np.concatenate([tree, rng.choice(others, extra, replace=False)])
+    else:
+        # Sparse graph, draw pairs until there are enough new ones
+        chosen = np.zeros(0, dtype=np.int64)
+        while len(chosen) < extra:
+            u, v = rng.integers(N, size=(2, 2 * (extra - len(chosen)) + 16))
+            u, v = u[u != v], v[u != v]
+            new = np.minimum(u, v) * N + np.maximum(u, v)
+            new = new[~np.isin(new, tree) & ~np.isin(new, chosen)]
+            _, first = np.unique(new, return_index=True)
+            chosen = np.concatenate([chosen, new[np.sort(first)]])
+        keys = np.concatenate([tree, chosen[:extra]])
+    return list(zip((keys // N).tolist(), (keys % N).tolist()))
+
+def grid_edges(rows: int, cols: int, walls: float=0.3, seed=None) -> tuple[list, dict]:
+    '''
+    Edge list and positions of a rows x cols grid, like the open areas of a floor plan.
+    A fraction walls of the edges off a random spanning tree of the grid is removed, the graph stays connected.
+    Vertex r*cols+c is at (c, r).
+    '''
+    rng = rng_for(seed)
+    N = rows * cols
+    ids = np.arange(N).reshape(rows, cols)
+    a = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    b = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+
+    # CSR adjacency of the grid for the spanning tree
+    src, dst = np.concatenate([a, b]), np.concatenate([b, a])
+    by_src = np.argsort(src, kind='stable')
+    ptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=N))])
+    parent, _ = random_spanning_tree(ptr, dst[by_src], 0, rng)
+    in_tree = (parent[a] == b) | (parent[b] == a)
+
+    keep = in_tree | (rng.random(len(a)) >= walls)
+    edges = list(zip(a[keep].tolist(), b[keep].tolist()))
+    pos = {v: (v % cols, v // cols) for v in range(N)}
+    return edges, pos
+
+def corridor_edges(rooms: int, room_size: int=3, seed=None) -> tuple[list, dict]:
+    '''
+    Edge list and positions of a corridor of rooms vertices with a room_size x room_size grid room behind every one,
+    alternately above and below the corridor, each room having a single door onto the corridor.
+    Rooms are randomly connected inside as in grid_edges.
+    '''
+    rng = rng_for(seed)
+    edges = [(i, i + 1) for i in range(rooms - 1)]
+    pos = {i: (i * room_size, 0) for i in range(rooms)}
+    for i in range(rooms):
+        room, room_pos = grid_edges(room_size, room_size, seed=rng.integers(2**31))
+        offset = rooms + i * room_size * room_size
+        side = 1 if i % 2 == 0 else -1
+        edges += [(offset + u, offset + v) for u, v in room]
+        for v, (x, y) in room_pos.items():
+            pos[offset + v] = (pos[i][0] + x - (room_size - 1) / 2, side * (1 + y))
+        door = offset + (room_size - 1) // 2 # middle of the row next to the corridor
+        edges.append((i, door))
+    return edges, pos
@@ -1,9 +1,37 @@
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
-from matplotlib.colors import to_rgba
-from collections import Counter
-from random import random, seed
+from engine import csr, label_tree, random_spanning_tree, random_spanning_trees, reroot_labels
+from generators import random_edges
+from graphfile import GraphFile, save_graph
+from layout import layouts
+
+MARKER_RADIUS = 0.15 # radius of a robot marker, in data units
+
+def robot_arrays(pos: dict, robots: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Centers, face colors and edge colors of the markers of the robots at every node.
+    '''
+    from matplotlib.colors import to_rgba_array
+    robots = [(n, r) for n, at in robots.items() for r in at]
+    if not robots:
+        return np.zeros((0, 2)), np.zeros((0, 4)), np.zeros((0, 4))
+    offsets = np.array([pos[n] for n, _ in robots], dtype=float)
+    offsets += [(0, 0) if n == 'sta' else r.offset for n, r in robots]
+    edge_colors = to_rgba_array([r.color for _, r in robots])
+    face_colors = edge_colors.copy()
+    face_colors[:, 3] = 0.5
+    return offsets, face_colors, edge_colors
+
+def robot_markers(ax, pos: dict, robots: dict, radius: float=MARKER_RADIUS) -> "EllipseCollection":
+    '''
+    Draws the robots at every node as a single collection of circles.
+    '''
+    from matplotlib.collections import EllipseCollection
+    offsets, face_colors, edge_colors = robot_arrays(pos, robots)
+    markers = EllipseCollection(2*radius, 2*radius, 0, units='xy', offsets=offsets, offset_transform=ax.transData,
+        facecolors=face_colors, edgecolors=edge_colors, zorder=10)
+    ax.add_collection(markers, autolim=False)
+    return markers
 
 class Graph:
     def __init__(self, arg=None, directed=False, pos=None) -> None:
@@ -44,43 +72,32 @@ class Graph:
         self.start = sta
         self.g.add_edge('sta', sta)
 
-    def random_graph(self) -> list[list[int]]:
+    @staticmethod
+    def random_graph(N: int=None, k: float=None, seed=None) -> list[tuple[int, int]]:
         '''
-        Generates an edge list of a graph with N vertices and branching factor k,
-        where N is randomized between 10 to 20 and k is randomized between 2 to 5.
+        Generates an edge list of a connected graph with N vertices and branching factor k in O(N*k),
+        see generators.random_edges. If not given, N is randomized between 10 to 20 and k between 2 to 5.
         '''
-        k = np.random.randint(2, 5)
-        print(f'Random branching factor k = {k}')
-        N = np.random.randint(10, 20)
-        print(f'Random number of vertices N = {N}')
-
-        edge_list = []
-        visited = [0]
-        to_visit = list(range(1, N))
-
-        for _ in range(N-1):
-            sta = np.random.choice(visited)
-            end = np.random.choice(to_visit)
-            to_visit.remove(end)
-            visited.append(end)
-            a,b = min(sta, end), max(sta, end)
-            edge_list.append((a,b))
-
-        edges = {}
-        for i in range(N):
-            for j in range(i+1, N):
-                edges[(i, j)] = 1
+        if k is None:
+            k = np.random.randint(2, 5)
+            print(f'Random branching factor k = {k}')
+        if N is None:
+            N = np.random.randint(10, 20)
+            print(f'Random number of vertices N = {N}')
+        return random_edges(N, k, seed)
 
-        for edge in edge_list:
-            edges.pop(edge)
+    def save(self, path: str, parents=None, orders=None) -> None:
+        '''
+        Writes the graph, its spanning tree and the given extra trees to a compact binary file, see graphfile.save_graph.
+        '''
+        save_graph(path, self, parents, orders)
 
-        edges = list(edges.keys())
-        length = k * N // 2 - (N-1)
-        idxs = np.random.choice(len(edges), length, replace=False)
-        for i in idxs:
-            edge = edges[i]
-            edge_list.append(edge)
-        return edge_list
+    @staticmethod
+    def load(path: str, tree: int=0) -> "Graph":
+        '''
+        Graph of a file written by save, with the tree-th tree of the file as its spanning tree.
+        '''
+        return GraphFile(path).graph(tree)
 
     def is_tree(self) -> bool:
         '''
@@ -90,61 +107,114 @@ class Graph:
             return nx.is_tree(self.g.to_undirected())
         return nx.is_tree(self.g)
 
-    def generate_random_spanning_tree(self) -> None:
+    def generate_random_spanning_tree(self, seed=None, cache: "TreeCache"=None) -> None:
         '''
         Generates a random spanning tree.
-        If the initial graph is not a tree, use Algorithm 4.
+        If the initial graph is not a tree, use Algorithm 4, drawing from np.random or from the given seed.
+        With a cache, the tree, its labels and the non-tree edges are looked up by the content of the graph,
+        the starting node and the seed, and stored there when they are generated.
         '''
         if self.is_tree():
             return self
         else:
+            if cache is not None:
+                cached = cache.get(self, seed)
+                if cached is not None:
+                    self.set_spanning_tree(*cached)
+                    return
             # Use Algorithm 4
-            edges = []
-            sta = 'sta'
-            visited = {node: False for node in self.g.nodes()}
-            parents = dict()
-
-            while len(edges) != self.g.number_of_nodes() - 1:
-                visited[sta] = True
-                neighbors = []
-                for v in self.g[sta]:
-                    if not visited[v]:
-                        neighbors.append(v)
-                if len(neighbors) == 0:
-                    sta = parents[sta]
-                    continue
-                end = np.random.choice(neighbors)
-                parents[end] = sta
-                edges.append((sta, end))
-                sta = end
-            non_tree_edges = []
+            nodes, ptr, adj = self.adjacency()
+            rng = np.random if seed is None else np.random.default_rng(seed)
+            parent, order = random_spanning_tree(ptr, adj, nodes.index('sta'), rng)
+            labels, mu = label_tree(parent, order)
+            self.set_spanning_tree(parent, order, labels)
+            if cache is not None:
+                cache.put(self, seed, parent, order, labels, mu)
+
+    def adjacency(self) -> tuple[list, np.ndarray, np.ndarray]:
+        '''
+        Returns the node order and the CSR adjacency of the graph, trees are given as parent arrays over this order.
+        '''
+        nodes = list(self.g.nodes())
+        ptr, adj, _ = csr(self.g, nodes, {n: i for i, n in enumerate(nodes)})
+        return nodes, ptr, adj
+
+    def sample_spanning_trees(self, count: int, seed=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        Samples count random spanning trees as per Algorithm 4 and labels them as per Algorithm 2.
+        Returns the parent arrays, the DFS preorders and the number of searchers mu of every tree.
+        '''
+        nodes, ptr, adj = self.adjacency()
+        rng = np.random if seed is None else np.random.default_rng(seed)
+        parents, orders = random_spanning_trees(ptr, adj, nodes.index('sta'), count, rng)
+        mus = np.array([label_tree(parent, order)[1] for parent, order in zip(parents, orders)], dtype=np.int64)
+        return parents, orders, mus
+
+    def set_spanning_tree(self, parent, order, labels=None, B: list=None) -> None:
+        '''
+        Uses the tree given as a parent array and a preorder over the graph nodes as the spanning tree,
+        labeling it as per Algorithm 2. The labels (as given by label_tree) and the non-tree edges B,
+        if already known, are used instead of being computed again.
+        '''
+        nodes = list(self.g.nodes())
+        index = {n: i for i, n in enumerate(nodes)}
+        parent = np.asarray(parent).tolist()
+        edges = [(nodes[parent[v]], nodes[v]) for v in np.asarray(order[1:]).tolist()]
+        if B is None:
+            B = []
             for a,b in self.g.edges():
-                if (a,b) in edges or (b,a) in edges:
+                if parent[index[a]] == index[b] or parent[index[b]] == index[a]:
                     continue
-                non_tree_edges.append((min(a,b), max(a,b)))
+                B.append((min(a,b), max(a,b)))
 
-            # Create the (undirected) tree version of it
-            self.t = Graph(edges, directed=False)
-            self.t.start = self.start
-            self.t.pos = self.pos
-            self.B = non_tree_edges
+        # Create the (undirected) tree version of it
+        self.t = Graph(edges, directed=False)
+        self.t.start = self.start
+        self.t.pos = self.pos
+        self.B = B
+        if labels is None:
             self.t.label() # Label the edges as per Algorithm 2
+        else:
+            self.t.set_labels(parent, labels, index)
 
-    def get_spanning_tree(self) -> tuple["Graph", list[list[int]]]:
+    def get_spanning_tree(self, seed=None, cache: "TreeCache"=None) -> tuple["Graph", list[list[int]]]:
         '''
-        Algorithm 4, returns the tree edges and the non-tree edges.
+        Algorithm 4, returns the tree edges and the non-tree edges, see generate_random_spanning_tree.
         '''
         if not hasattr(self, 't'):
-            self.generate_random_spanning_tree()
+            self.generate_random_spanning_tree(seed, cache)
         return self.t, self.B
 
-    def label_reverse(self, parents: list[int]) -> None:
+    def searchers_per_start(self) -> dict:
+        '''
+        Number of searchers mu that Algorithm 2 gives on the spanning tree with every node as the starting node,
+        computed in one rerooting pass instead of relabeling the tree for every node.
+        '''
+        tree = self.t if hasattr(self, 't') else self
+        parents = {n: p for n, p in nx.bfs_predecessors(tree.g, self.start) if n != 'sta'}
+        order = [self.start, *parents]
+        index = {n: i for i, n in enumerate(order)}
+        parent = np.array([-1] + [index[parents[n]] for n in order[1:]], dtype=np.int64)
+        mu = reroot_labels(parent, np.arange(len(order)))
+        return dict(zip(order, mu.tolist()))
+
+    def best_starts(self, candidates: list=None) -> tuple[int, list]:
+        '''
+        Returns the fewest searchers needed and the starting node(s) needing them, among the candidates if given
+        (e.g. the doors of a building), otherwise among all nodes.
+        '''
+        mu = self.searchers_per_start()
+        if candidates is not None:
+            mu = {n: mu[n] for n in candidates}
+        best = min(mu.values())
+        return best, [n for n, m in mu.items() if m == best]
+
+    def label_reverse(self, parents: dict) -> None:
         '''
         Reverse labelling after Algorithm 2 is performed.
         '''
-        for i in range(0, self.g.number_of_nodes()):
-            if i in parents:
-                self.g.edges[(i, parents[i])]['label'] = -self.g.edges[(parents[i], i)]['label']
+        for node, parent in parents.items():
+            self.g.edges[(node, parent)]['label'] = -self.g.edges[(parent, node)]['label']
 
     def label(self) -> None:
         '''
@@ -152,64 +222,53 @@ class Graph:
         '''
         assert self.is_tree(), "Method only applicable to trees"
 
-        # BFS traversal in a parent-child structure
+        # BFS traversal in a parent-child structure, as arrays for the labeling engine
         parents = dict(nx.bfs_predecessors(self.g, 'sta'))
-
-        def is_leaf(node):
-            if self.is_directed:
-                return self.g.in_degree(node) == 1 and node != 'sta'
-            else:
-                return self.g.degree(node) == 1 and node != 'sta'
-
-        def get_edge_info(node):
-            adj = list(self.g[node])
-            edge_labels = [self.g.edges[(node, neighbor)]['label'] for neighbor in adj]      
-            label_counts = Counter(edge_labels) # to check for majority label
-            return adj, edge_labels, label_counts
-
-        def get_parent(node):
-            return parents[node]
+        order = ['sta', *parents]
+        index = {n: i for i, n in enumerate(order)}
+        parent = np.array([-1] + [index[parents[n]] for n in order[1:]], dtype=np.int64)
+        labels, _ = label_tree(parent, np.arange(len(order)))
 
         # Algorithm 2
-        buffer = [x for x in self.g.nodes() if is_leaf(x)]
-        while buffer:
-            node = buffer.pop()
-            if is_leaf(node):
-                # the only edge, so assign label to 1
-                parent = get_parent(node)
-                self.g.edges[(parent, node)]['label'] = 1
-            else:
-                adj, edge_labels, label_counts = get_edge_info(node)
-                # if it has exactly one unlabeled edge
-                if label_counts[-1] == 1:
-                    # find that unlabeled edge
-                    child = adj[edge_labels.index(-1)]
-                    l_max = max(edge_labels)
-                    if l_max == -1: continue
-                    max_cout = label_counts[l_max]
-                    if max_cout == 1:
-                        self.g.edges[(node, child)]['label'] = l_max
-                    else:
-                        self.g.edges[(node, child)]['label'] = l_max + 1
-            if node != 'sta':
-                # if current node != start and its parent has exactly one unlabeled edge
-                # add the parent node to buffer
-                parent = get_parent(node)
-                adj, edge_labels, label_counts = get_edge_info(parent)
-                if label_counts[-1] == 1:
-                    buffer.append(parent)
+        labels = labels.tolist()
+        nx.set_edge_attributes(self.g, {(parents[n], n): labels[i] for i, n in enumerate(order) if i > 0}, 'label')
 
         # Set number of searchers for Algorithm 5
         self.mu = self.g.edges[('sta', self.start)]['label']
         self.g = self.g.to_directed()
         self.label_reverse(parents)
 
-    def visualize(self, save=True, filename='testrun', ax=None, step=None, robot=False):  
-        def get_nudge(node='sta', searcher=None, jitter=0.2):
-            if node == 'sta': return (0, 0)
-            if searcher: seed(searcher.id)
-            return ((random()*2-1)*jitter, (random()*2-1)*jitter)
+    def set_labels(self, parent: list, labels, index: dict) -> None:
+        '''
+        Labels the tree with the labels label_tree gave over the parent array of a graph, index giving
+        the position of every node there. The tree ends up as after label(), without labeling it again.
+        '''
+        labels = np.asarray(labels).tolist()
+        g = nx.DiGraph()
+        g.add_nodes_from(self.g.nodes())
+        g.add_edges_from((u, v, {'label': labels[index[v]] if parent[index[v]] == index[u] else -labels[index[u]]})
+                         for u, neighbors in self.g.adjacency() for v in neighbors)
+        self.g = g
+        self.mu = self.g.edges[('sta', self.start)]['label']
+
+    def layout(self, g, **kwargs) -> dict:
+        '''
+        Positions of the nodes of g, the graph or its spanning tree: pos if it is set, otherwise a spring layout
+        computed once per graph structure, or the fast layered layout if the fast_layout attribute is set.
+        '''
+        if self.pos is not None:
+            return self.pos
+        return layouts.get(g, self.layout_prog('spring'), **kwargs)
 
+    def layout_prog(self, prog: str) -> str:
+        return 'layers' if getattr(self, 'fast_layout', False) else prog
+
+    def visualize(self, save=True, filename='testrun', ax=None, step=None, robot=False, image=False):  
+        '''
+        Draws the graph, saving it to filename if save else showing it.
+        With image=True the RGB image of the figure is returned instead.
+        '''
+        import matplotlib.pyplot as plt # only loaded when drawing, solving stays headless
         if hasattr(self, 'fig_size'):
             fig_size = self.fig_size
         else:
@@ -232,16 +291,10 @@ class Graph:
 
         if not self.is_tree():
             if not hasattr(self, 't'):
-                if self.pos is None:
-                    pos = nx.spring_layout(self.g)
-                else:
-                    pos = self.pos
+                pos = self.layout(self.g)
                 nx.draw_networkx(self.g, pos=pos, with_labels=True, node_color='c', ax=ax, node_size=node_size, width=3)
             else:
-                if self.pos is None:
-                    pos = nx.spring_layout(self.t.g, k=3, seed=1)
-                else:
-                    pos = self.pos
+                pos = self.layout(self.t.g, k=3, seed=1)
                 try:
                     visited_nodes = {node for node in self.g.nodes() if self.g.nodes[node]['visited']}
                 except KeyError:
@@ -279,10 +332,7 @@ class Graph:
                 if not robot:
                     nx.draw_networkx_labels(self.g, labels=node_label, pos=pos, ax=ax)
                 else:
-                    for n in self.g.nodes():
-                        for s in robot_per_node_viz[n]:
-                            x, y = pos[n]
-                            plt.gca().add_patch(plt.Circle((x+get_nudge(n, searcher=s)[0], y+get_nudge(n, searcher=s)[1]), 0.15, facecolor=to_rgba(s.color, alpha=0.5), edgecolor=s.color, zorder=10))
+                    robot_markers(ax, pos, robot_per_node_viz)
                 tree_edges = self.t.g.edges()
                 non_tree_edges = self.B
                 edge_colors = []
@@ -303,7 +353,7 @@ class Graph:
                 if not robot: nx.draw_networkx_edges(self.g, pos=pos, edge_color=edge_colors, style=edge_styles, ax=ax, width=3)
         else:
             if self.g.is_directed():
-                pos = nx.nx_agraph.graphviz_layout(self.t.g, prog='circo',args="-Grankdir=LR", root='sta')
+                pos = layouts.get(self.t.g, self.layout_prog('circo'), args="-Grankdir=LR", root='sta')
                 try:
                     visited_nodes = {node for node in self.g.nodes() if self.g.nodes[node]['visited']}
                 except KeyError:
@@ -341,17 +391,20 @@ class Graph:
                 if not robot:
                     nx.draw_networkx_labels(self.g, labels=node_label, pos=pos, ax=ax)
                 else:
-                    for n in self.g.nodes():
-                        for s in robot_per_node_viz[n]:
-                            x, y = pos[n]
-                            plt.gca().add_patch(plt.Circle((x+get_nudge(n, searcher=s)[0], y+get_nudge(n, searcher=s)[1]), 0.15, facecolor=to_rgba(s.color, alpha=0.5), edgecolor=s.color, zorder=10))
+                    robot_markers(ax, pos, robot_per_node_viz)
                 G = self.g
                 curved_edges = [edge for edge in G.edges() if reversed(edge) in G.edges()]
                 straight_edges = list(set(G.edges()) - set(curved_edges))
                 if not robot: nx.draw_networkx_edges(G, pos, ax=ax)
             else:
-                pos = nx.nx_agraph.graphviz_layout(self.g, prog='dot')
+                pos = layouts.get(self.g, self.layout_prog('dot'))
                 nx.draw(self.g, pos=pos, with_labels=True, node_color='c', ax=ax, node_size=node_size)
+        if image:
+            fig = ax.figure
+            fig.canvas.draw()
+            frame = np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()
+            plt.close(fig)
+            return frame
         if save:
             plt.savefig(filename)
             plt.close()
@@ -0,0 +1,272 @@
+'''
+Compact binary file of a graph, its spanning trees and their labels, loaded zero-copy through a memory map,
+so that large maps and thousands of precomputed trees are shared between processes without unpickling.
+Background images are not stored, they stay with the map modules in graphs/.
+
+    python graphfile.py --floor-plan gates --trees 1000 --output gates.gsst
+    python graphfile.py --family grid --size 100000 --seed 3 --output grid.gsst
+    python graphfile.py --info gates.gsst
+
+The file is MAGIC, the length of a JSON header as a little-endian uint64, the header, then the arrays,
+every one starting at a multiple of ALIGN bytes. The header gives the dtype, shape and offset of every array
+(from the end of the padded header) along with the node labels and the scalar attributes of the graph.
+Nodes are referred to by their index in the node order of the graph, -1 standing for no node.
+'''
+import argparse
+import json
+import mmap
+import sys
+import numpy as np
+from engine import csr, label_tree
+
+MAGIC = b'GSSTGRF1'
+ALIGN = 64
+ATTRIBUTES = ('fig_size', 'node_size', 'offset', 'fast_layout') # graph attributes kept in the header
+
+def insertion_order(g, nodes: list, index: dict) -> list:
+    '''
+    Edges of g as index pairs in an order that adding them to an empty networkx graph, after the nodes,
+    gives every node its neighbors in the same order as in g, so that searches on the loaded graph behave the same.
+    For an undirected graph, an edge comes once it is next in the neighbors of both its ends.
+    '''
+    if g.is_directed():
+        return [(index[u], index[v]) for u, v in g.edges()]
+    neighbors = [[index[v] for v in g[n]] for n in nodes]
+    heads = [0] * len(nodes) # position of the next edge to add in the neighbors of every node
+
+    def ready(u: int) -> bool:
+        if heads[u] == len(neighbors[u]):
+            return False
+        v = neighbors[u][heads[u]]
+        return heads[v] < len(neighbors[v]) and neighbors[v][heads[v]] == u
+
+    stack = [u for u in range(len(nodes)) if ready(u) and u <= neighbors[u][heads[u]]]
+    edges = []
+    while stack:
+        u = stack.pop()
+        v = neighbors[u][heads[u]]
+        edges.append((u, v))
+        heads[u] += 1
+        if v != u:
+            heads[v] += 1
+        stack += [w for w in {u, v} if ready(w)]
+
+    if len(edges) < g.number_of_edges():
+        # Edges were removed from g, no order gives the same neighbors, keep the networkx one for the rest
+        added = {(min(u, v), max(u, v)) for u, v in edges}
+        edges += [(index[a], index[b]) for a, b in g.edges() if (min(index[a], index[b]), max(index[a], index[b])) not in added]
+    return edges
+
+def tree_arrays(graph: "Graph", index: dict) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Parent array and preorder, over the graph node order, of the spanning tree of the graph
+    as set by set_spanning_tree: the tree nodes are in preorder and the parent of a node is its earliest neighbor.
+    '''
+    order = np.array([index[n] for n in graph.t.g.nodes()], dtype=np.int64)
+    rank = {n: i for i, n in enumerate(graph.t.g.nodes())}
+    parent = np.full(len(index), -1, dtype=np.int64)
+    for n in list(graph.t.g.nodes())[1:]:
+        parent[index[n]] = index[min(graph.t.g[n], key=rank.get)]
+    return parent, order
+
+def save_graph(path: str, graph: "Graph", parents=None, orders=None) -> None:
+    '''
+    Writes the graph to path with its spanning tree if it has one, followed by the trees given as
+    parent arrays and preorders over the graph node order (e.g. from Graph.sample_spanning_trees).
+    Arrays:
+    - nodes:        Integer label of every node, -1 for 'sta' (nodes may only be integers and 'sta')
+    - edges:        Edges as (E, 2) node indices, in insertion order, see insertion_order
+    - edge_labels:  Label of every edge, only if some edge is labeled (the graph is itself a labeled tree)
+    - g_ptr, g_adj: CSR adjacency of the graph, as in Engine
+    - pos:          (N, 2) positions of the nodes, NaN for nodes without one, only if the graph has positions
+    - parents:      (T, N) parent arrays of the trees, -1 at the root
+    - orders:       (T, N) preorders of the trees
+    - labels:       (T, N) label of the edge (parent[v], v) of every tree, as per Algorithm 2
+    - mus:          Number of searchers of every tree
+    - B:            (M, 2) non-tree edges of the spanning tree of the graph, only if it has one
+    '''
+    nodes = list(graph.g.nodes())
+    if any(n != 'sta' and not isinstance(n, (int, np.integer)) for n in nodes):
+        raise ValueError("Only integer nodes and 'sta' can be stored")
+    index = {n: i for i, n in enumerate(nodes)}
+    dtype = np.int32 if len(nodes) < 2**31 else np.int64
+
+    edges = insertion_order(graph.g, nodes, index)
+    ptr, adj, _ = csr(graph.g, nodes, index)
+    arrays = {
+        'nodes': np.array([-1 if n == 'sta' else n for n in nodes], dtype=np.int64),
+        'edges': np.array(edges, dtype=dtype).reshape(-1, 2),
+        'g_ptr': ptr.astype(np.int64),
+        'g_adj': adj.astype(dtype),
+    }
+    edge_labels = [graph.g.edges[nodes[u], nodes[v]].get('label', -1) for u, v in edges]
+    if any(l != -1 for l in edge_labels):
+        arrays['edge_labels'] = np.array(edge_labels, dtype=dtype)
+    if graph.pos is not None:
+        arrays['pos'] = np.array([graph.pos.get(n, (np.nan, np.nan)) for n in nodes], dtype=np.float64)
+
+    trees = []
+    if hasattr(graph, 't'):
+        trees.append(tree_arrays(graph, index))
+        arrays['B'] = np.array([(index[a], index[b]) for a, b in graph.B], dtype=dtype).reshape(-1, 2)
+    if parents is not None:
+        trees += zip(parents, orders)
+    if trees:
+        arrays['parents'] = np.array([parent for parent, _ in trees], dtype=dtype)
+        arrays['orders'] = np.array([order for _, order in trees], dtype=dtype)
+        labeled = [label_tree(parent, order) for parent, order in trees]
+        arrays['labels'] = np.array([labels for labels, _ in labeled], dtype=dtype)
+        arrays['mus'] = np.array([mu for _, mu in labeled], dtype=np.int64)
+
+    header = {
+        'directed': graph.g.is_directed(),
+        'start': graph.start,
+        'attributes': {name: getattr(graph, name) for name in ATTRIBUTES if hasattr(graph, name)},
+    }
+    write_arrays(path, arrays, header)
+
+def write_arrays(path: str, arrays: dict, header: dict) -> None:
+    '''
+    Writes the arrays by name and the JSON-serializable header in the file format of the module.
+    '''
+    header = dict(header, arrays={})
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = [array.dtype.str, list(array.shape), offset]
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    encoded = json.dumps(header).encode()
+    start = -(-(len(MAGIC) + 8 + len(encoded)) // ALIGN) * ALIGN
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC + np.uint64(len(encoded)).astype('<u8').tobytes() + encoded)
+        f.write(b'\0' * (start - f.tell()))
+        for name, array in arrays.items():
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.write(b'\0' * (-array.nbytes % ALIGN))
+
+def map_arrays(path: str) -> tuple[dict, dict, mmap.mmap]:
+    '''
+    Maps a file written by write_arrays read-only, returns its header, its arrays by name as views of the map and the map.
+    '''
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{path} is not a graph file')
+    length = int(np.frombuffer(buffer, '<u8', 1, len(MAGIC))[0])
+    header = json.loads(buffer[len(MAGIC) + 8:len(MAGIC) + 8 + length])
+    start = -(-(len(MAGIC) + 8 + length) // ALIGN) * ALIGN
+    arrays = {}
+    for name, (dtype, shape, offset) in header['arrays'].items():
+        arrays[name] = np.frombuffer(buffer, dtype, int(np.prod(shape)), start + offset).reshape(shape)
+    return header, arrays, buffer
+
+class GraphFile:
+    def __init__(self, path: str) -> None:
+        '''
+        Graph file written by save_graph, memory mapped read-only: the arrays are views of the file,
+        shared with every other process mapping it, and pages are only read when used.
+        Pickling a GraphFile (e.g. to send it to a worker process) only sends the path, the worker maps the file again.
+        Attributes:
+        - path:       File mapped
+        - directed:   Is the graph directed?
+        - start:      Starting node of the graph
+        - attributes: Scalar attributes of the graph, see ATTRIBUTES
+        - nodes:      Label of every node, 'sta' included
+        - arrays:     Every array of the file by name, see save_graph. They are also attributes, None if absent
+        '''
+        self.path = path
+        header, self.arrays, self.buffer = map_arrays(path)
+        self.directed = header['directed']
+        self.start = header['start']
+        self.attributes = header['attributes']
+        self.nodes = ['sta' if n == -1 else n for n in self.arrays['nodes'].tolist()]
+
+    def __getattr__(self, name: str):
+        if name in ('edges', 'edge_labels', 'g_ptr', 'g_adj', 'pos', 'parents', 'orders', 'labels', 'mus', 'B'):
+            return self.arrays.get(name)
+        raise AttributeError(name)
+
+    def __reduce__(self):
+        return GraphFile, (self.path,)
+
+    def __len__(self) -> int:
+        '''
+        Number of trees in the file.
+        '''
+        return 0 if self.parents is None else len(self.parents)
+
+    def tree(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Parent array and preorder of the k-th tree, as views of the file.
+        '''
+        return self.parents[k], self.orders[k]
+
+    def graph(self, tree: int=0) -> "Graph":
+        '''
+        Builds the Graph, with the same node and neighbor order as the saved one, and the tree-th tree
+        as its spanning tree (labeled as per Algorithm 2) if there are trees and tree is not None.
+        '''
+        from graph import Graph
+        nodes = self.nodes
+        pos = None
+        if self.pos is not None:
+            pos = {n: tuple(p) for n, p in zip(nodes, self.pos.tolist()) if not np.isnan(p[0])}
+        graph = Graph([], directed=self.directed, pos=pos)
+        graph.g.add_nodes_from(nodes)
+        edges = self.edges.tolist()
+        if self.edge_labels is None:
+            graph.g.add_edges_from(((nodes[u], nodes[v]) for u, v in edges), label=-1)
+        else:
+            graph.g.add_edges_from((nodes[u], nodes[v], {'label': l}) for (u, v), l in zip(edges, self.edge_labels.tolist()))
+        graph.start = self.start
+        for name, value in self.attributes.items():
+            setattr(graph, name, tuple(value) if isinstance(value, list) else value)
+        if tree is not None and len(self) > 0:
+            B = None
+            if tree == 0 and self.B is not None: # the spanning tree the graph was saved with
+                B = [(nodes[a], nodes[b]) for a, b in self.B.tolist()]
+            graph.set_spanning_tree(*self.tree(tree), self.labels[tree], B)
+        return graph
+
+    def info(self) -> str:
+        lines = [f'{self.path}: {len(self.nodes)} nodes, {len(self.edges)} edges, {len(self)} trees, '
+                 f'{len(self.buffer) / 2**20:.1f} MiB']
+        if self.mus is not None:
+            lines.append(f'searchers per tree: min {self.mus.min()}, mean {self.mus.mean():.2f}, max {self.mus.max()}')
+        for name, array in self.arrays.items():
+            lines.append(f'  {name:12} {array.dtype.str:4} {array.shape}')
+        return '\n'.join(lines)
+
+def main(argv=None) -> int:
+    from experiments import FAMILIES, make_graph
+    from solve import FLOOR_PLANS, floor_plan
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--floor-plan', choices=FLOOR_PLANS)
+    source.add_argument('--family', choices=FAMILIES, default='random')
+    source.add_argument('--info', metavar='FILE', help='describe a graph file')
+    parser.add_argument('--size', type=int, default=100)
+    parser.add_argument('--k', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trees', type=int, default=0, help='random spanning trees sampled on top of the one of the graph')
+    parser.add_argument('--output', default='graph.gsst')
+    args = parser.parse_args(argv)
+
+    if args.info is not None:
+        print(GraphFile(args.info).info())
+        return 0
+    if args.floor_plan is not None:
+        graph = floor_plan(args.floor_plan)
+        np.random.seed(args.seed)
+        graph.generate_random_spanning_tree()
+    else:
+        graph = make_graph(args.family, args.size, args.k, args.seed)
+    parents = orders = None
+    if args.trees > 0:
+        parents, orders, _ = graph.sample_spanning_trees(args.trees, seed=args.seed)
+    save_graph(args.output, graph, parents, orders)
+    print(GraphFile(args.output).info())
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+import os
+import sys
+
+def lazy_background(module: str, filename: str):
+    '''
+    Module __getattr__ of a floor plan, decoding its background image next to the module
+    only when bg is first accessed, so that solving on the floor plan does not load PIL.
+    '''
+    def __getattr__(name):
+        if name != 'bg':
+            raise AttributeError(f'module {module!r} has no attribute {name!r}')
+        import numpy as np
+        from PIL import Image
+        path = os.path.join(os.path.dirname(sys.modules[module].__file__), filename)
+        bg = np.array(Image.open(path).convert('RGB'))
+        setattr(sys.modules[module], 'bg', bg)
+        return bg
+    return __getattr__
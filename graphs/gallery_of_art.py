@@ -1,5 +1,4 @@
-from PIL import Image
-import numpy as np
+from graphs.background import lazy_background
 locations = [
     (1250.6666, 497.3333),
     (1253.3334, 264.0000),
@@ -93,8 +92,9 @@ edges = [
     (66, 67), (67, 68), (68, 69), (10, 27), (49, 58), (41, 42), (43, 47)
 ]
 
-bg = 'graphs/art_museum.png'
-bg = np.array(Image.open(bg).convert('RGB'))
-print(bg.shape)
+# Background image, decoded on first access
+__getattr__ = lazy_background(__name__, 'art_museum.png')
 
 sta = (14, 6)
+
+__all__ = ['locations', 'fig_size', 'edges', 'bg', 'sta']
@@ -1,5 +1,4 @@
-from PIL import Image
-import numpy as np
+from graphs.background import lazy_background
 
 locations = [(141.0000,	86.0000),
 (210.0000,	87.0000),
@@ -48,8 +47,9 @@ edges = [(1,2), (2,3), (3,4), (4,5), (3,7), (6,7), (7,8),
 
 locations[22] = (locations[22][0] + 0.7, locations[22][1])
 
-bg = 'graphs/gates.png'
-bg = np.array(Image.open(bg).convert('RGB'))
-print(bg.shape)
+# Background image, decoded on first access
+__getattr__ = lazy_background(__name__, 'gates.png')
 
 sta = (3, 5.2)
+
+__all__ = ['locations', 'fig_size', 'edges', 'bg', 'sta']
@@ -1,5 +1,4 @@
-from PIL import Image
-import numpy as np
+from graphs.background import lazy_background
 locations = [
     (20.7880,	25.0679),
     (50.4416,	19.5652),
@@ -79,8 +78,9 @@ edges = [
 
 locations[53] = (locations[53][0], locations[53][1] - 1)
 
-bg = 'graphs/simon_hall.png'
-bg = np.array(Image.open(bg).convert('RGB'))
-print(bg.shape)
+# Background image, decoded on first access
+__getattr__ = lazy_background(__name__, 'simon_hall.png')
 
 sta = (0.2, 8.5)
+
+__all__ = ['locations', 'fig_size', 'edges', 'bg', 'sta']
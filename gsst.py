@@ -1,27 +1,79 @@
 import numpy as np
 import networkx as nx
-from copy import deepcopy
 from graph import Graph
-from random import choice, seed
+from engine import Engine
+from history import History
+from instrument import UNTIMED
+from random import Random, choice
+import logging
 import os
-import imageio
+import time
 
-WALL_TIME = 5
+WALL_TIME = 5 # default step limit of a search, in steps per node (plus one)
+
+# Messages of the searches, e.g. logging.getLogger('gsst').setLevel(logging.INFO) to see them
+log = logging.getLogger(__name__)
+JITTER = 0.2 # largest offset of a robot marker from its node
 
 class Searcher:
     sid = -1
-    def __init__(self, guard=False):
-        Searcher.sid += 1
-        self.id = Searcher.sid
-        seed(self.id)
-        self.color = choice(['red', 'green', 'cyan', 'purple', 'limegreen', 'blue', 'yellow', 'orange'])
+    def __init__(self, guard=False, id: int=None):
+        '''
+        A searcher or guard, its color and the offset of its marker from its node are fixed by its id
+        so that it is drawn the same way in every frame. The id is the next one unless given, e.g. by a replay.
+        '''
+        if id is None:
+            Searcher.sid += 1
+            id = Searcher.sid
+        self.id = id
+        rng = Random(self.id)
+        self.offset = ((rng.random()*2-1)*JITTER, (rng.random()*2-1)*JITTER)
+        self.color = Random(self.id).choice(['red', 'green', 'cyan', 'purple', 'limegreen', 'blue', 'yellow', 'orange'])
         if guard: self.color = 'white'
 
+class SearchResult:
+    __slots__ = ('completed', 'stopped', 'steps', 'searchers', 'guards', 'to_visit', 'seconds')
+
+    def __init__(self, solver: "GSST", stopped: str, seconds: float) -> None:
+        '''
+        Outcome of a search.
+        Attributes:
+        - completed: Were all the nodes visited?
+        - stopped:   Why the search stopped early, 'max_steps' or 'max_seconds', None if it completed
+        - steps:     Number of steps done
+        - searchers: Number of searchers used
+        - guards:    Number of guards used, 0 for variants without guards
+        - to_visit:  Nodes left to visit
+        - seconds:   Wall-clock time of the search
+        '''
+        self.completed = stopped is None
+        self.stopped = stopped
+        self.steps = solver.t
+        self.searchers = solver.num_searcher
+        self.guards = getattr(solver, 'number_of_guards', 0)
+        self.to_visit = solver.unvisited()
+        self.seconds = seconds
+
+    def __repr__(self) -> str:
+        outcome = 'completed' if self.completed else f'stopped at {self.stopped} with {len(self.to_visit)} nodes to visit'
+        return (f'SearchResult({outcome}, steps={self.steps}, searchers={self.searchers}, guards={self.guards}, '
+                f'seconds={self.seconds:.3f})')
+
 class GSST:
-    def __init__(self, graph:"Graph"=None, tree:"Graph"=None, filename='test_run') -> None:
+    def __init__(self, graph:"Graph"=None, tree:"Graph"=None, filename='test_run', history_options:dict=None, instruments:"Instrumentation"=None, trace:"MoveTrace"=None) -> None:
+        '''
+        Performs GSST (Algorithm 3) on the spanning tree of the given graph.
+        history_options are passed on to History, e.g. dict(checkpoint_every=100, window=10, max_memory=2**30)
+        bounds the memory used by the history of long runs.
+        instruments is an Instrumentation timing the phases of the run and counting its events, None to disable it.
+        trace is a MoveTrace the moves are streamed to while searching, None to disable it.
+        '''
+        self.instruments = instruments
+        self.trace = trace
         if tree == None:
             self.graph = graph
-            self.spanning_tree, self.B = self.graph.get_spanning_tree()
+            with self.phase('spanning_tree'):
+                self.spanning_tree, self.B = self.graph.get_spanning_tree()
         elif graph == None:
             self.graph = tree
             if self.graph.g.is_directed:
@@ -34,34 +86,63 @@ class GSST:
         self.t = 0
         self.N = self.graph.g.number_of_nodes()
 
+        with self.phase('setup'):
+            # All the search state below is indexed by the node indices of the engine
+            self.engine = Engine(self.graph, self.spanning_tree)
+            self.init_state()
+
+            # Nodes whose attributes changed since the last saved step
+            self.dirty = set(range(self.N))
+            self.set_node_attributes()
+            self.history = History(self.graph, self.spanning_tree, **(history_options or {}))
+            self.save_history()
+        self.fn = filename
+        self.png_saved = False
+
+    def init_state(self) -> None:
+        sta = self.engine.sta
+        start = self.engine.index[self.graph.start]
+
         # Visitation status
-        self.to_visit = {i for i in self.graph.g.nodes()}
-        self.to_visit.remove('sta')
-        self.visited = {i: False for i in self.graph.g.nodes()}
-        self.visited['sta'] = True
-        self.unvisited_g = {n: self.graph.g.degree[n]
-            for n in self.graph.g.nodes()}
-        self.unvisited_g[graph.start] -= 1
-        self.unvisited_t = {n: self.spanning_tree.g.out_degree[n]
-            for n in self.spanning_tree.g.nodes()}
-        self.unvisited_t[graph.start] -= 1
+        self.to_visit = set(range(self.N))
+        self.to_visit.remove(sta)
+        self.visited = np.zeros(self.N, dtype=bool)
+        self.visited[sta] = True
+        self.unvisited_g = self.engine.degree()
+        self.unvisited_g[start] -= 1
+        self.unvisited_t = self.engine.out_degree()
+        self.unvisited_t[start] -= 1
 
         # Searcher locations
-        self.searcher_locations = ['sta' for _ in range(self.num_searcher)]
-        self.searcher_per_locations = {i: 0 for i in self.graph.g.nodes()}
-        self.searcher_per_locations['sta'] = self.num_searcher
-        self.searcher_per_locations_viz = {i: [] for i in self.graph.g.nodes()}
-        self.searcher_per_locations_viz['sta'] = [Searcher() for _ in range(self.num_searcher)]
+        self.searcher_locations = [sta for _ in range(self.num_searcher)]
+        self.searcher_per_locations = np.zeros(self.N, dtype=np.int64)
+        self.searcher_per_locations[sta] = self.num_searcher
+        self.searcher_per_locations_viz = [[] for _ in range(self.N)]
+        self.searcher_per_locations_viz[sta] = [Searcher() for _ in range(self.num_searcher)]
 
-        self.set_node_attributes()
-        self.history = []
-        self.save_history()
-        self.fn = filename
+    def phase(self, name: str):
+        '''
+        Context timing a phase of the run if instrumented.
+        '''
+        return UNTIMED if self.instruments is None else self.instruments.phase(name)
+
+    def changed(self, values) -> dict:
+        '''
+        Values of the nodes changed since the last saved step, keyed by node label.
+        '''
+        nodes = self.engine.nodes
+        dirty = list(self.dirty)
+        if isinstance(values, np.ndarray):
+            return dict(zip([nodes[i] for i in dirty], values[dirty].tolist()))
+        return {nodes[i]: values[i] for i in dirty}
 
     def set_node_attributes(self) -> None:
-        nx.set_node_attributes(self.graph.g, self.searcher_per_locations, 'searcher_number')
-        nx.set_node_attributes(self.graph.g, self.visited, 'visited')
-        nx.set_node_attributes(self.graph.g, self.searcher_per_locations_viz, 'searcher_viz')
+        '''
+        Writes the state of the changed nodes to the node attributes of the graph.
+        '''
+        nx.set_node_attributes(self.graph.g, self.changed(self.searcher_per_locations), 'searcher_number')
+        nx.set_node_attributes(self.graph.g, self.changed(self.visited), 'visited')
+        nx.set_node_attributes(self.graph.g, self.changed(self.searcher_per_locations_viz), 'searcher_viz')
 
     ## Might not be correct, think about labels?
     def can_move_searcher(self, node) -> bool:
@@ -76,14 +157,14 @@ class GSST:
 
     def searcher_to_new_node(self, node) -> None:
         self.visited[node] = True
-        for n in self.graph.g[node]:
-            self.unvisited_g[n] -= 1
-        for n in self.spanning_tree.g[node]:
-            self.unvisited_t[n] -= 1
+        self.dirty.add(node)
+        self.history.record_visit(self.engine.nodes[node])
+        self.unvisited_g[self.engine.neighbors(node)] -= 1
+        self.unvisited_t[self.engine.children(node)] -= 1
 
-    def move_searcher(self, num, node, positive_edge=True) -> None:
+    def move_searcher(self, num, node, positive_edge=True, edge=None) -> None:
         '''
-        Moves the num-th searcher to node.
+        Moves the num-th searcher to node, edge is the position of the tree edge taken if known.
         '''
         prev_node = self.searcher_locations[num]
         self.searcher_per_locations[prev_node] -= 1
@@ -92,6 +173,9 @@ class GSST:
         self.searcher_locations[num] = node
         self.searcher_per_locations[node] += 1
         self.searcher_per_locations_viz[node].append(prev_s)
+        self.dirty.update((prev_node, node))
+        if self.instruments is not None:
+            self.instruments.count('moves')
 
         if self.visited[node] == False:
             self.searcher_to_new_node(node)
@@ -99,13 +183,22 @@ class GSST:
         if node in self.to_visit:
             self.to_visit.remove(node)
 
-        if positive_edge:
-            self.spanning_tree.g[prev_node][node]['label'] -= 1
-        else:
-            self.spanning_tree.g[prev_node][node]['label'] += 1
+        if edge is None:
+            edge = self.engine.edge(prev_node, node)
+        delta = -1 if positive_edge else 1
+        label = self.engine.add_label(prev_node, edge, delta)
+        nodes = self.engine.nodes
+        # Recorded after the guards freed by the visit, in the order of the trace
+        self.history.record_move('searcher', num, nodes[prev_node], nodes[node])
+        self.history.record_label((nodes[prev_node], nodes[node]), label)
+        if self.trace is not None:
+            self.trace.record_move(self.t + 1, 'searcher', num, nodes[prev_node], nodes[node], delta)
 
     def save_history(self) -> None:
-        self.history.append(deepcopy(self.graph))
+        self.history.save({self.engine.nodes[i] for i in self.dirty})
+        self.dirty = set()
+        if self.trace is not None:
+            self.trace.end_step()
 
     def search_step(self) -> None:
         '''
@@ -115,101 +208,146 @@ class GSST:
             node = self.searcher_locations[i]
             can_move = self.can_move_searcher(node)
 
-            if not can_move: continue
-
-            adj = list(self.spanning_tree.g[node])
-            edge_labels = np.array([self.spanning_tree.g.edges[(node, neighbor)]['label'] for neighbor in adj])      
-            positive = np.where(edge_labels > 0)[0]
-            negative = np.where(edge_labels < 0)[0]
-
-            if len(positive) > 0:
-                idx = np.argmin(edge_labels[positive])
-                next_node = adj[positive[idx]]
-                self.move_searcher(i, next_node)
-            elif len(negative) > 0:
-                next_node_idx = negative[0]
-                next_node = adj[next_node_idx]
-                self.move_searcher(i, next_node, positive_edge=False)
-            else:
+            if not can_move:
+                if self.instruments is not None:
+                    self.instruments.count('blocked')
                 continue
 
+            # Smallest positive label first, otherwise the first negative one
+            edge, positive = self.engine.next_edge(node)
+            if edge < 0:
+                continue
+            self.move_searcher(i, self.engine.t_adj[edge].item(), positive_edge=positive, edge=edge)
+
             self.after_search_step()
 
     def after_search_step(self) -> None:
         pass
 
-    def search(self, visualize=False) -> None:
+    def search(self, visualize=False, max_steps: int=None, max_seconds: float=None) -> SearchResult:
         '''
-        Performs Algorithm 3.
+        Performs Algorithm 3, stopping early after max_steps steps (WALL_TIME steps per node by default)
+        or max_seconds seconds, and returns the outcome. Nothing is printed, messages go to the 'gsst' logger.
         '''
-        print('Search started with {} searchers'.format(self.num_searcher))
+        log.info('Search started with %d searchers', self.num_searcher)
+        started = time.perf_counter()
+        if max_steps is None:
+            max_steps = WALL_TIME * self.N + 1
         self.png_saved = visualize
         if visualize:
-            self.history[-1].visualize(save=True, filename=f'{self.fn}_{self.t}.png')
-            self.history[-1].visualize(save=True, filename=f'{self.fn}_{self.t}_robot.png', robot=True)
+            with self.phase('render'):
+                self.visualize_step(self.t)
+        if self.trace is not None:
+            self.trace.begin(self)
+        if self.instruments is not None:
+            self.instruments.begin()
+        stopped = None
         while len(self.to_visit) != 0:
-            if self.t > WALL_TIME * self.N:
-                print(f'INTERRUPTED!\nTime: {self.t}, Number of searchers: {self.num_searcher}, unvisited area: {self.to_visit}')
-                exit()
-            self.search_step()
-            self.set_node_attributes()      
-            self.save_history()
+            stopped = self.limit(max_steps, max_seconds, started)
+            if stopped is not None:
+                break
+            with self.phase('search_step'):
+                self.search_step()
+            with self.phase('set_node_attributes'):
+                self.set_node_attributes()
+            with self.phase('save_history'):
+                self.save_history()
             self.t += 1
             if visualize:
-                self.visualize_step(self.t)
+                with self.phase('render'):
+                    self.visualize_step(self.t)
+            if self.instruments is not None:
+                self.instruments.end_step(self)
+        return self.finish(stopped, started)
 
-    def visualize(self) -> None:
-        for suffix in ['', '_robot']:
-            fns = []
-            for i in range(self.t + 1):
-                if not self.png_saved:
-                    self.visualize_step(i)
-                fns.append(f'{self.fn}_{i}{suffix}.png')
-            imageio.mimsave(f'{self.fn}{suffix}.mp4', [imageio.imread(filename) for filename in fns], fps=2)
+    def limit(self, max_steps: int, max_seconds: float, started: float) -> str:
+        '''
+        Name of the limit the search reached, None if it can go on.
+        '''
+        if self.t >= max_steps:
+            return 'max_steps'
+        if max_seconds is not None and time.perf_counter() - started > max_seconds:
+            return 'max_seconds'
+        return None
+
+    def finish(self, stopped: str, started: float) -> SearchResult:
+        result = SearchResult(self, stopped, time.perf_counter() - started)
+        if stopped is not None:
+            log.info('Search stopped at %s: time %d, number of searchers %d, %d nodes to visit',
+                        stopped, self.t, self.num_searcher, len(self.to_visit))
+        if self.trace is not None:
+            self.trace.close(self)
+        return result
+
+    def unvisited(self) -> set:
+        '''
+        Labels of the nodes still to visit.
+        '''
+        return {self.engine.nodes[i] for i in self.to_visit}
+
+    def visualize(self, workers: int=1, png=False, hold=True) -> None:
+        '''
+        Writes the videos of the run, streaming the frames into the encoder as they are rendered.
+        Frames the search already saved as PNG are reused, otherwise they are only written as PNG if png=True.
+        With workers > 1 the frames are rendered in that many processes.
+        With hold, steps that change nothing visible are not rendered and the previous frame is held instead.
+        '''
+        from render import write_videos, write_videos_from_frames
+        if self.png_saved:
+            write_videos_from_frames(self.fn, range(self.t + 1))
+        else:
+            with self.phase('render'):
+                write_videos(self.history, self.fn, range(self.t + 1), workers, png, hold=hold)
+            self.png_saved = png
 
     def visualize_step(self, step: int) -> None:
-        self.history[step].visualize(save=True, filename=f'{self.fn}_{step}.png', step=step)
-        self.history[step].visualize(save=True, filename=f'{self.fn}_{step}_robot.png', robot=True, step=step)
+        from render import render_frame
+        render_frame(self.history[step], self.fn, step)
 
 class GSST_L(GSST):
-    def __init__(self, graph: Graph=None, filename='test_run') -> None:
+    def __init__(self, graph: Graph=None, filename='test_run', history_options:dict=None, instruments:"Instrumentation"=None, trace:"MoveTrace"=None) -> None:
         '''
         Variant of GSST as shown in Algorithm 5.
         '''
         self.number_of_guards = 0
         self.N = graph.g.number_of_nodes()
-        # Initially no guard needed at all
-        self.guard_per_locations = {i: 0 for i in graph.g.nodes()}
-        self.guard_per_locations['sta'] = self.number_of_guards
-        self.guard_per_locations_viz = {i: [] for i in graph.g.nodes()}
-        self.guard_per_locations_viz['sta'] = [Searcher(guard=True) for _ in range(self.number_of_guards)]
         self.to_guard = None
 
-        super().__init__(graph, filename=filename)
+        super().__init__(graph, filename=filename, history_options=history_options, instruments=instruments, trace=trace)
         self.guard_locations = []
         self.guard_degree = {0: set(), 1: set()}
 
-        self.non_tree_edge_nodes = {i: False for i in graph.g.nodes()}
-        self.non_tree_edge_nodes['sta'] = False
+        self.non_tree_edge_nodes = np.zeros(self.N, dtype=bool)
         for edge in self.B:
             a, b = edge
-            self.non_tree_edge_nodes[a] = True
-            self.non_tree_edge_nodes[b] = True
+            self.non_tree_edge_nodes[self.engine.index[a]] = True
+            self.non_tree_edge_nodes[self.engine.index[b]] = True
+
+    def init_state(self) -> None:
+        super().init_state()
+        sta = self.engine.sta
+        # Initially no guard needed at all
+        self.guard_per_locations = np.zeros(self.N, dtype=np.int64)
+        self.guard_per_locations[sta] = self.number_of_guards
+        self.guard_per_locations_viz = [[] for _ in range(self.N)]
+        self.guard_per_locations_viz[sta] = [Searcher(guard=True) for _ in range(self.number_of_guards)]
+        # Guards at every node, so that guard updates only look at the neighborhood of a node
+        self.guards_at = [set() for _ in range(self.N)]
 
     def call_guard(self, node):
-        assert node != 'sta' or self.print_guard_info('Should not call guard at starting node')
+        assert node != self.engine.sta or self.print_guard_info('Should not call guard at starting node')
+        if self.instruments is not None:
+            self.instruments.count('guards_called')
 
         guard = None
         if len(self.guard_degree[0]) > 0:
             guard = self.guard_degree[0].pop()
 
         elif self.visited[node] == False:
-            for g in self.guard_degree[1]:
-                loc = self.guard_locations[g]
-                for n in self.graph.g[loc]:
-                    if node == n:
-                        guard = g
-                        break
+            # a guard with one unvisited neighbor, next to node
+            near = [g for n in self.engine.neighbors(node).tolist() for g in self.guards_at[n] if g in self.guard_degree[1]]
+            if near:
+                guard = max(near)
 
         if guard == None:          
             guard = self.add_guard()
@@ -217,32 +355,60 @@ class GSST_L(GSST):
         self.move_guard(guard, node)
 
     def print_guard_info(self, txt):
-        print()
-        print('~'*50)
-        print(txt)
-        print(f'Number of guards: {self.number_of_guards}')
-        print(f'Guard locations: {self.guard_locations}')
-        print(f'Guard per locations: {self.guard_per_locations}')
-        print(f'Guard degree: {self.guard_degree}')
-        print('~'*50)
+        nodes = self.engine.nodes
+        log.error('%s\nNumber of guards: %d\nGuard locations: %s\nGuard per locations: %s\nGuard degree: %s',
+                  txt, self.number_of_guards, [nodes[loc] for loc in self.guard_locations],
+                  dict(zip(nodes, self.guard_per_locations.tolist())), self.guard_degree)
         return False
     
     def add_guard(self) -> None:
-        assert self.guard_per_locations['sta'] == 0 or self.print_guard_info('Have existing guards available')
-        self.guard_locations.append('sta')
-        self.guard_per_locations['sta'] += 1
-        self.guard_per_locations_viz['sta'].append(Searcher(guard=True))
+        sta = self.engine.sta
+        assert self.guard_per_locations[sta] == 0 or self.print_guard_info('Have existing guards available')
+        self.guard_locations.append(sta)
+        self.guards_at[sta].add(self.number_of_guards)
+        self.guard_per_locations[sta] += 1
+        marker = Searcher(guard=True)
+        self.guard_per_locations_viz[sta].append(marker)
+        self.dirty.add(sta)
         self.number_of_guards += 1
+        self.history.record_move('guard', self.number_of_guards - 1, None, 'sta')
+        if self.trace is not None:
+            self.trace.record_move(self.t + 1, 'guard', self.number_of_guards - 1, None, 'sta', marker=marker.id)
+        if self.instruments is not None:
+            self.instruments.count('guards_added')
         return self.number_of_guards - 1
 
     def free_guard(self, guard) -> None:
+        '''
+        Releases a guard whose node has no unvisited neighbor left, sending it back to sta.
+        '''
+        if self.guard_to_sta(guard) and self.instruments is not None:
+            self.instruments.count('guards_freed')
+
+    def guard_to_sta(self, guard) -> bool:
+        '''
+        Detaches a guard from its node and puts it at sta, returns False if it already was there.
+        '''
+        sta = self.engine.sta
         prev_loc = self.guard_locations[guard]
+        if prev_loc == sta:
+            return False
         if prev_loc != None:
             self.guard_per_locations[prev_loc] -= 1
             self.guard_per_locations_viz[prev_loc].pop(0)
-        self.guard_locations[guard] = 'sta'
-        self.guard_per_locations['sta'] += 1
-        self.guard_per_locations_viz['sta'].append(Searcher(guard=True))
+            self.guards_at[prev_loc].discard(guard)
+            self.dirty.add(prev_loc)
+        self.guard_locations[guard] = sta
+        self.guards_at[sta].add(guard)
+        self.guard_per_locations[sta] += 1
+        marker = Searcher(guard=True)
+        self.guard_per_locations_viz[sta].append(marker)
+        self.dirty.add(sta)
+        src = None if prev_loc is None else self.engine.nodes[prev_loc]
+        self.history.record_move('guard', guard, src, 'sta')
+        if self.trace is not None:
+            self.trace.record_move(self.t + 1, 'guard', guard, src, 'sta', marker=marker.id)
+        return True
 
     def add_guard_in_degree(self, guard, deg):
         if deg in self.guard_degree:
@@ -266,31 +432,38 @@ class GSST_L(GSST):
                 self.guard_degree[deg].remove(guard)
 
     def move_guard(self, guard, node) -> None:
-        self.free_guard(guard)    
+        self.guard_to_sta(guard)
         self.remove_guard_from_degree(guard)
 
-        deg = self.unvisited_g[node]
+        deg = int(self.unvisited_g[node])
         if deg == 0:
             raise ValueError("Guard should not be at a node with no unvisited neighbors")
         self.add_guard_in_degree(guard, deg)
 
+        sta = self.engine.sta
         self.guard_locations[guard] = node
+        self.guards_at[sta].discard(guard)
+        self.guards_at[node].add(guard)
         self.guard_per_locations[node] += 1
-        self.guard_per_locations['sta'] -= 1
-        self.guard_per_locations_viz[node].append(self.guard_per_locations_viz['sta'].pop(0))
+        self.guard_per_locations[sta] -= 1
+        self.guard_per_locations_viz[node].append(self.guard_per_locations_viz[sta].pop(0))
+        self.dirty.update((node, sta))
+        self.history.record_move('guard', guard, 'sta', self.engine.nodes[node])
+        if self.trace is not None:
+            self.trace.record_move(self.t + 1, 'guard', guard, 'sta', self.engine.nodes[node])
 
     def set_node_attributes(self) -> None:
         super().set_node_attributes()
-        nx.set_node_attributes(self.graph.g, self.guard_per_locations, 'guard_number')
-        nx.set_node_attributes(self.graph.g, self.guard_per_locations_viz, 'guard_viz')
+        nx.set_node_attributes(self.graph.g, self.changed(self.guard_per_locations), 'guard_number')
+        nx.set_node_attributes(self.graph.g, self.changed(self.guard_per_locations_viz), 'guard_viz')
 
     def searcher_to_new_node(self, node) -> None:
         super().searcher_to_new_node(node)
-        for neighbor in self.graph.g[node]:
-            deg = self.unvisited_g[neighbor]
+        for neighbor in self.engine.neighbors(node).tolist():
+            deg = int(self.unvisited_g[neighbor])
             if deg >= 2: continue
 
-            guards_to_update = [g for g, loc in enumerate(self.guard_locations) if loc == neighbor]
+            guards_to_update = sorted(self.guards_at[neighbor])
             for g in guards_to_update:
                 self.remove_guard_from_degree(g)
                 self.add_guard_in_degree(g, deg)
@@ -316,7 +489,7 @@ class GSST_L(GSST):
         #print(f'self.guard_per_locations[node]: {self.guard_per_locations[node]}')
         #print(f'self.searcher_per_locations[node]: {self.searcher_per_locations[node]}')
 
-        if self.unvisited_g[node] == 0 and node != 'sta':
+        if self.unvisited_g[node] == 0 and node != self.engine.sta:
             assert self.guard_per_locations[node] == 0 or self.print_guard_info(f'Guard at node {node} should have been cleared')
 
         if tree_can_move == False:
@@ -332,17 +505,23 @@ class GSST_L(GSST):
         return True
 
 class GSST_R(GSST):
-    def __init__(self, graph: Graph=None, filename='test_run') -> None:
+    def __init__(self, graph: Graph=None, filename='test_run', history_options:dict=None, instruments:"Instrumentation"=None, trace:"MoveTrace"=None) -> None:
         '''
         Variant of GSST as shown in Algorithm 6.
         '''
         self.number_of_guards = 0 # no guard needed
         self.N = graph.g.number_of_nodes()
 
-        super().__init__(graph, filename=filename)
-        self.searcher_locations = ['sta']
-        self.searcher_per_locations['sta'] = 1
+        super().__init__(graph, filename=filename, history_options=history_options, instruments=instruments, trace=trace)
+        sta = self.engine.sta
+        self.searcher_locations = [sta]
+        self.searcher_per_locations[sta] = 1
         self.num_searcher = 1
+        # Tree edges are drawn in the order of the tree nodes
+        self.rank = np.empty(self.N, dtype=np.int64)
+        self.rank[[self.engine.index[n] for n in self.spanning_tree.g.nodes()]] = np.arange(self.N)
+        self.dirty.add(sta)
+        self.set_node_attributes()
         self.history.clear()
         self.save_history()
 
@@ -352,36 +531,61 @@ class GSST_R(GSST):
         '''
         raise NotImplementedError
 
-    def search(self) -> None:
+    def search(self, max_steps: int=None, max_seconds: float=None) -> SearchResult:
         '''
-        Performs Algorithm 6, ignores tree labelings.
+        Performs Algorithm 6, ignores tree labelings. Limits and outcome as for GSST.search.
         '''
-        print('Search started with {} searchers'.format(self.num_searcher))
-        N_c = {'sta'}
+        log.info('Search started with %d searchers', self.num_searcher)
+        started = time.perf_counter()
+        if max_steps is None:
+            max_steps = WALL_TIME * self.N + 1
+        N_c = {self.engine.sta}
+        if self.trace is not None:
+            self.trace.begin(self)
+        if self.instruments is not None:
+            self.instruments.begin()
+        stopped = None
         while len(self.to_visit) != 0:
-            if self.t > WALL_TIME * self.N:
-                print(f'INTERRUPTED!\nTime: {self.t}, Number of searchers: {self.num_searcher}, unvisited area: {self.to_visit}')
-                exit()
-            self.search_step(N_c)
-            self.set_node_attributes()      
-            self.save_history()
+            stopped = self.limit(max_steps, max_seconds, started)
+            if stopped is not None:
+                break
+            with self.phase('search_step'):
+                self.search_step(N_c)
+            with self.phase('set_node_attributes'):
+                self.set_node_attributes()
+            with self.phase('save_history'):
+                self.save_history()
             self.t += 1
+            if self.instruments is not None:
+                self.instruments.end_step(self)
+        return self.finish(stopped, started)
 
     def search_step(self, N_c) -> None:
         '''
         Performs search for a single step.
         '''
-        edges = [(a, b) for a, b in self.spanning_tree.g.edges() if a in N_c]
-        src, nxt = choice(edges)
+        edges = [(a, edge) for a in sorted(N_c, key=self.rank.__getitem__)
+            for edge in range(self.engine.t_ptr[a], self.engine.t_ptr[a+1])]
+        src, edge = choice(edges)
+        nxt = int(self.engine.t_adj[edge])
         if self.can_move_searcher(src):
             for idx in range(self.num_searcher):
                 if self.searcher_locations[idx] == src:
-                    self.move_searcher(idx, nxt)
+                    self.move_searcher(idx, nxt, edge=edge)
                     break
             N_c.add(nxt)
         else:
             # generate a new searcher at the root
-            self.searcher_locations.append('sta')
-            self.searcher_per_locations['sta'] += 1
+            sta = self.engine.sta
+            self.searcher_locations.append(sta)
+            self.searcher_per_locations[sta] += 1
             self.num_searcher += 1
-        print(self.to_visit, self.searcher_locations)
+            self.dirty.add(sta)
+            self.history.record_move('searcher', self.num_searcher - 1, None, 'sta')
+            if self.trace is not None:
+                self.trace.record_move(self.t + 1, 'searcher', self.num_searcher - 1, None, 'sta')
+            if self.instruments is not None:
+                self.instruments.count('searchers_added')
+        if log.isEnabledFor(logging.DEBUG):
+            nodes = self.engine.nodes
+            log.debug('To visit %s, searchers at %s', self.unvisited(), [nodes[i] for i in self.searcher_locations])
@@ -0,0 +1,264 @@
+import logging
+import networkx as nx
+from bisect import bisect_right
+from copy import copy
+
+log = logging.getLogger(__name__)
+
+RECORD_BYTES = 256 # rough size of one stored node, label or move record, used for the memory budget
+
+def build_frame(graph: "Graph", tree: "Graph", nodes: dict, labels: dict) -> "Graph":
+    '''
+    Copy of the graph with the given node attributes and tree labels, ready to be visualized.
+    '''
+    frame = copy(graph) # shares the background image and positions
+    frame.g = graph.g.copy()
+    for n, attrs in nodes.items():
+        frame.g.nodes[n].update(attrs)
+    if hasattr(frame, 't') and frame.t is tree and tree is not None:
+        frame.t = copy(tree)
+        frame.t.g = tree.g.copy()
+        nx.set_edge_attributes(frame.t.g, labels, 'label')
+    return frame
+
+class Delta:
+    '''
+    Changes made to the search state during a single step.
+    Attributes:
+    - moves:    (kind, robot, from, to) for every searcher/guard move, kind is 'searcher' or 'guard'
+    - visited:  Nodes visited for the first time
+    - labels:   (edge, label) for every tree edge label change, label is the value after the change
+    - nodes:    Node attributes of every node touched during the step, after the step
+    - before:   (nodes, labels) before the step, only kept while the step is in the recent window
+    '''
+    __slots__ = ('moves', 'visited', 'labels', 'nodes', 'before')
+
+    def __init__(self) -> None:
+        self.moves = []
+        self.visited = []
+        self.labels = []
+        self.nodes = {}
+        self.before = None
+
+    def size(self) -> int:
+        size = len(self.moves) + len(self.visited) + len(self.labels) + len(self.nodes)
+        if self.before is not None:
+            size += len(self.before[0]) + len(self.before[1])
+        return size
+
+class History:
+    def __init__(self, graph: "Graph", tree: "Graph"=None, checkpoint_every: int=None, window: int=0, max_memory: int=None) -> None:
+        '''
+        Delta-encoded history of a search run.
+        Only full states at checkpoints are stored, every other step only stores what changed in it,
+        so the cost of a step scales with the number of moves instead of the graph size.
+        Attributes:
+        - graph:            The Graph being searched, frames are rebuilt from it
+        - tree:             The labeled spanning tree whose labels are tracked
+        - checkpoint_every: A full state is kept every this many steps, None to only keep the first one
+        - window:           Number of recent steps that can be rebuilt backwards from the latest state,
+                            fewer if they do not fit in max_memory
+        - max_memory:       Rough memory budget in bytes, None for unbounded.
+                            Checkpoints are thinned out first, then the oldest steps are dropped.
+                            The latest state and the oldest checkpoint are always kept, so the budget
+                            cannot go below twice the size of one state. Below that, steps are never dropped.
+        - first:            Oldest step that can still be rebuilt
+        - deltas:           Delta of step first+i+1 at index i
+        - checkpoints:      Full (nodes, labels) states by step, always contains `first`
+        '''
+        self.graph = graph
+        self.tree = tree
+        self.checkpoint_every = checkpoint_every
+        self.window = window
+        self.max_memory = max_memory
+        self.clear()
+
+    def clear(self) -> None:
+        self.first = 0
+        self.deltas = []
+        self.checkpoints = {}
+        self.head = None # (nodes, labels) at the last saved step
+        self.pending = Delta()
+        self.cursor = None # last rebuilt (step, nodes, labels), makes sequential access O(delta)
+        self.records = 0
+        self.warned = False
+
+    def record_move(self, kind, robot, src, dst) -> None:
+        self.pending.moves.append((kind, robot, src, dst))
+
+    def record_visit(self, node) -> None:
+        self.pending.visited.append(node)
+
+    def record_label(self, edge, label) -> None:
+        self.pending.labels.append((edge, label))
+
+    def snapshot(self, node) -> dict:
+        return {k: list(v) if isinstance(v, list) else v for k, v in self.graph.g.nodes[node].items()}
+
+    def state_size(self) -> int:
+        return len(self.head[0]) + len(self.head[1])
+
+    def memory(self) -> int:
+        '''
+        Estimated memory used by the history in bytes.
+        '''
+        return self.records * RECORD_BYTES
+
+    def add_checkpoint(self, step, nodes, labels) -> None:
+        self.checkpoints[step] = (dict(nodes), dict(labels))
+        self.records += self.state_size()
+
+    def save(self, nodes) -> None:
+        '''
+        Closes the current step, storing the attributes of the given (changed) nodes.
+        The first call stores every node as the base state.
+        '''
+        if self.head is None:
+            base = {n: self.snapshot(n) for n in self.graph.g.nodes()}
+            labels = {} if self.tree is None else nx.get_edge_attributes(self.tree.g, 'label')
+            self.head = (base, labels)
+            self.records += self.state_size()
+            self.add_checkpoint(self.first, base, labels)
+            self.pending = Delta()
+            return
+
+        delta, self.pending = self.pending, Delta()
+        head_nodes, head_labels = self.head
+        delta.nodes = {n: self.snapshot(n) for n in nodes}
+        if self.window:
+            delta.before = ({n: head_nodes[n] for n in delta.nodes}, {e: head_labels[e] for e, _ in delta.labels})
+        head_nodes.update(delta.nodes)
+        head_labels.update(delta.labels)
+        self.deltas.append(delta)
+        self.records += delta.size()
+
+        # Steps leaving the window can only be rebuilt forwards
+        if self.window and len(self.deltas) > self.window:
+            old = self.deltas[-self.window-1]
+            if old.before is not None:
+                self.records -= len(old.before[0]) + len(old.before[1])
+                old.before = None
+
+        step = len(self) - 1
+        if self.checkpoint_every and step % self.checkpoint_every == 0:
+            self.add_checkpoint(step, head_nodes, head_labels)
+        if self.max_memory is not None:
+            self.shrink()
+
+    def shrink(self) -> None:
+        '''
+        Frees memory until the history fits in max_memory.
+        '''
+        while self.memory() > self.max_memory:
+            if not self.thin() and not self.rebase():
+                break
+
+    def thin(self) -> bool:
+        '''
+        Drops every other checkpoint and doubles the checkpoint interval.
+        '''
+        if not self.checkpoint_every or len(self.checkpoints) <= 2:
+            return False
+        self.checkpoint_every *= 2
+        for step in list(self.checkpoints):
+            if step != self.first and step % self.checkpoint_every != 0:
+                del self.checkpoints[step]
+                self.records -= self.state_size()
+        return True
+
+    def rebase(self) -> bool:
+        '''
+        Drops the oldest steps, keeping the recent window.
+        The new first step is the oldest checkpoint after the current one, or the start of the window.
+        If the window itself is over the budget, steps in it are dropped too.
+        Does nothing when the states that are always kept already exceed max_memory,
+        as rebuilding a checkpoint every step would not bring the history under the budget.
+        '''
+        if 2 * self.state_size() * RECORD_BYTES > self.max_memory:
+            if not self.warned:
+                log.warning(f'History memory budget of {self.max_memory} bytes is below the size of two states '
+                            f'({2 * self.state_size() * RECORD_BYTES} bytes), old steps are kept')
+                self.warned = True
+            return False
+        last = len(self) - 1
+        later = sorted(s for s in self.checkpoints if self.first < s <= last - self.window)
+        step = later[0] if later else last - self.window
+        if step <= self.first:
+            # The recent window does not fit, keep the latest steps taking half of the budget left by the two states
+            room = (self.max_memory // RECORD_BYTES - 2 * self.state_size()) // 2
+            step, kept = last, 0
+            while step > self.first + 1 and kept + self.delta(step).size() <= room:
+                kept += self.delta(step).size()
+                step -= 1
+            if step <= self.first:
+                return False
+        if step not in self.checkpoints:
+            nodes, labels = self.state(step)
+            self.add_checkpoint(step, nodes, labels)
+        for s in [s for s in self.checkpoints if s < step]:
+            del self.checkpoints[s]
+            self.records -= self.state_size()
+        for delta in self.deltas[:step - self.first]:
+            self.records -= delta.size()
+        del self.deltas[:step - self.first]
+        self.first = step
+        if self.cursor is not None and self.cursor[0] < step:
+            self.cursor = None
+        return True
+
+    def __len__(self) -> int:
+        return 0 if self.head is None else self.first + len(self.deltas) + 1
+
+    def delta(self, step: int) -> Delta:
+        '''
+        Returns the delta leading to the given step.
+        '''
+        if step < 0:
+            step += len(self)
+        if not self.first < step < len(self):
+            raise IndexError(f'No delta leads to step {step} in the history')
+        return self.deltas[step - self.first - 1]
+
+    def state(self, step: int) -> tuple[dict, dict]:
+        '''
+        Rebuilds the node attributes and the tree labels at the given step,
+        replaying from whichever of the nearest checkpoint, the last rebuilt step
+        or the latest state is closest.
+        '''
+        if step < 0:
+            step += len(self)
+        if not 0 <= step < len(self):
+            raise IndexError(f'Step {step} is not in the history')
+        if step < self.first:
+            raise IndexError(f'Step {step} was dropped to stay within the memory budget')
+
+        last = len(self) - 1
+        steps = sorted(self.checkpoints)
+        start = steps[bisect_right(steps, step) - 1]
+        if self.cursor is not None and start < self.cursor[0] <= step:
+            start = self.cursor[0]
+
+        if last - step < step - start and (last == step or self.delta(step + 1).before is not None):
+            nodes, labels = dict(self.head[0]), dict(self.head[1])
+            for i in range(last, step, -1):
+                before_nodes, before_labels = self.delta(i).before
+                nodes.update(before_nodes)
+                labels.update(before_labels)
+            return nodes, labels
+
+        if self.cursor is not None and start == self.cursor[0]:
+            _, nodes, labels = self.cursor
+        else:
+            nodes, labels = (dict(x) for x in self.checkpoints[start])
+        for i in range(start + 1, step + 1):
+            delta = self.delta(i)
+            nodes.update(delta.nodes)
+            labels.update(delta.labels)
+        self.cursor = (step, nodes, labels)
+        return dict(nodes), dict(labels)
+
+    def __getitem__(self, step: int) -> "Graph":
+        '''
+        Rebuilds the Graph at the given step, ready to be visualized.
+        '''
+        return build_frame(self.graph, self.tree, *self.state(step))
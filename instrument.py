@@ -0,0 +1,91 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+# Context of a phase that is not timed
+UNTIMED = nullcontext()
+
+# Events counted by the searches, every step of the trace has all of them
+EVENTS = ('moves', 'blocked', 'guards_called', 'guards_added', 'guards_freed', 'searchers_added')
+
+class Instrumentation:
+    def __init__(self, trace=False, callbacks: list=None) -> None:
+        '''
+        Phase timers, event counters and a per-step trace of a search run, see the instruments argument of GSST.
+        A search without instrumentation only pays for a None check per phase and per event.
+        Attributes:
+        - times:     Seconds spent in every phase, e.g. 'search_step', 'set_node_attributes', 'save_history', 'render'
+        - calls:     Number of times every phase ran
+        - counters:  Number of every event, see EVENTS
+        - steps:     Number of steps done
+        - trace:     One record per step if trace=True: the step, its duration, the events during it
+                     and the number of searchers, guards and nodes to visit after it
+        - callbacks: Functions called with (solver, record) after every step
+        '''
+        self.times = {}
+        self.calls = {}
+        self.counters = dict.fromkeys(EVENTS, 0)
+        self.steps = 0
+        self.trace = [] if trace else None
+        self.callbacks = list(callbacks or [])
+        self.last = ({}, time.perf_counter()) # counters and time at the end of the previous step
+
+    def begin(self) -> None:
+        '''
+        Starts timing the first step.
+        '''
+        self.last = (dict(self.counters), time.perf_counter())
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0) + time.perf_counter() - started
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, n: int=1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def end_step(self, solver) -> None:
+        '''
+        Closes the step the solver just did, recording it and calling the callbacks.
+        '''
+        self.steps += 1
+        if self.trace is None and not self.callbacks:
+            return
+        counters, started = self.last
+        now = time.perf_counter()
+        record = {
+            't': solver.t,
+            'seconds': now - started,
+            **{name: n - counters.get(name, 0) for name, n in self.counters.items()},
+            'searchers': solver.num_searcher,
+            'guards': getattr(solver, 'number_of_guards', 0),
+            'to_visit': len(solver.to_visit),
+        }
+        self.last = (dict(self.counters), now)
+        if self.trace is not None:
+            self.trace.append(record)
+        for callback in self.callbacks:
+            callback(solver, record)
+
+    def summary(self) -> dict:
+        return {
+            'steps': self.steps,
+            'phases': {name: {'seconds': self.times[name], 'calls': self.calls[name]} for name in self.times},
+            'counters': dict(self.counters),
+        }
+
+    def write_summary(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_trace(self, path: str) -> None:
+        '''
+        Writes the per-step trace as JSON lines.
+        '''
+        with open(path, 'w') as f:
+            for record in self.trace or []:
+                f.write(json.dumps(record) + '\n')
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import pickle
+import networkx as nx
+from collections import deque
+
+FAST_LAYOUT_NODES = 1000 # graphs with more nodes than this get the layered layout
+
+def layered_layout(g, root=None) -> dict:
+    '''
+    Layout in O(V+E) for large graphs: nodes are placed in columns by their BFS depth from root
+    (or from the first node of every connected component), and spread evenly within a column.
+    Positions are scaled to [-1, 1] as for spring_layout.
+    '''
+    g = g.to_undirected(as_view=True) if g.is_directed() else g
+    depth = {}
+    columns = []
+    sources = ([root] if root is not None and root in g else []) + list(g.nodes())
+    for source in sources:
+        if source in depth:
+            continue
+        base = len(columns)
+        depth[source] = base
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            if depth[u] == len(columns):
+                columns.append([])
+            columns[depth[u]].append(u)
+            for v in g[u]:
+                if v not in depth:
+                    depth[v] = depth[u] + 1
+                    queue.append(v)
+
+    width = max((len(column) for column in columns), default=1)
+    pos = {}
+    for x, column in enumerate(columns):
+        for y, n in enumerate(column):
+            pos[n] = (2 * x / max(len(columns) - 1, 1) - 1, (2 * y - len(column) + 1) / max(width - 1, 1))
+    return pos
+
+class LayoutCache:
+    def __init__(self, path: str=None) -> None:
+        '''
+        Node layouts keyed by graph structure, so that every frame of a run shares the layout
+        computed for the first one. The cache can be saved to and loaded from a pickle file.
+        Attributes:
+        - path:    File the cache is saved to by save() and loaded from if it exists
+        - layouts: Positions of the nodes for every key
+        '''
+        self.path = path
+        self.layouts = {}
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def key(self, g, prog: str, **kwargs) -> str:
+        '''
+        Hash of the nodes and edges of g, in order, and of the layout options.
+        '''
+        structure = repr((g.is_directed(), list(g.nodes()), list(g.edges()), prog, sorted(kwargs.items())))
+        return hashlib.sha1(structure.encode()).hexdigest()
+
+    def get(self, g, prog: str='spring', **kwargs) -> dict:
+        '''
+        Layout of g computed by prog: 'spring' (nx.spring_layout), 'layers' (layered_layout)
+        or a graphviz program such as 'dot' or 'circo'. kwargs are passed on to the layout function.
+        Graphs with more than FAST_LAYOUT_NODES nodes always get the layered layout,
+        which only takes the root option.
+        '''
+        if prog == 'layers' or g.number_of_nodes() > FAST_LAYOUT_NODES:
+            prog, kwargs = 'layers', {'root': kwargs.get('root', 'sta')}
+        key = self.key(g, prog, **kwargs)
+        if key not in self.layouts:
+            if prog == 'spring':
+                self.layouts[key] = nx.spring_layout(g, **kwargs)
+            elif prog == 'layers':
+                self.layouts[key] = layered_layout(g, **kwargs)
+            else:
+                self.layouts[key] = nx.nx_agraph.graphviz_layout(g, prog=prog, **kwargs)
+        return self.layouts[key]
+
+    def save(self, path: str=None) -> None:
+        with open(path or self.path, 'wb') as f:
+            pickle.dump(self.layouts, f)
+
+    def load(self, path: str=None) -> None:
+        with open(path or self.path, 'rb') as f:
+            self.layouts.update(pickle.load(f))
+
+    def clear(self) -> None:
+        self.layouts = {}
+
+# Shared by every Graph, see Graph.visualize
+layouts = LayoutCache()
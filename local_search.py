@@ -0,0 +1,202 @@
+import math
+import time
+import numpy as np
+import networkx as nx
+from anytime import count_guards, solver_copy
+from engine import label_tree
+
+class LocalSearch:
+    def __init__(self, graph: "Graph", schedule='hill', temperature: float=1.0, guards=False, seed=None) -> None:
+        '''
+        Improves the spanning tree of the graph by edge swaps: a non-tree edge from B is added
+        and a random tree edge on the cycle it closes is removed.
+        After a swap only the labels on the reversed path and above the two changed attachment points
+        are updated, walking up until a label does not change.
+        A swap is kept if it does not increase the energy, mu plus the sum of all labels scaled below 1,
+        or for schedule='annealing' with probability exp(-increase / T), T going linearly from temperature to 0.
+        Attributes:
+        - nodes:    Node label of every index, as in Graph.adjacency
+        - parent:   Parent of every node in the current tree, -1 at 'sta'
+        - children: Children of every node in the current tree
+        - label:    Label of the edge (parent[v], v) for every node v, mu at 'sta'
+        - B:        Current non-tree edges
+        - progress: (seconds since start, mu, guards) for the initial tree and every tree with fewer searchers,
+                    guards is None unless guards=True, in which case GSST_L is run on these trees
+        '''
+        if schedule not in ['hill', 'annealing']:
+            raise ValueError(f'Unknown schedule {schedule}')
+        self.graph = graph
+        self.schedule = schedule
+        self.temperature = temperature
+        self.guards = guards
+        self.rng = np.random.default_rng(seed)
+
+        tree = graph.get_spanning_tree()[0]
+        self.nodes = list(graph.g.nodes())
+        index = {n: i for i, n in enumerate(self.nodes)}
+        self.root = index['sta']
+        parents = dict(nx.bfs_predecessors(tree.g, 'sta'))
+        parent = np.full(len(self.nodes), -1, dtype=np.int64)
+        for n, p in parents.items():
+            parent[index[n]] = index[p]
+        label, mu = label_tree(parent, [self.root] + [index[n] for n in parents])
+
+        self.parent = parent.tolist()
+        self.children = [set() for _ in self.nodes]
+        for v, p in enumerate(self.parent):
+            if p >= 0:
+                self.children[p].add(v)
+        self.label = label.tolist()
+        self.label[self.root] = mu
+        self.total = sum(self.label)
+        self.B = [(index[a], index[b]) for a, b in graph.B]
+
+        self.best = (self.energy(), list(self.parent))
+        self.progress = []
+        self.iterations = 0
+        self.accepted = 0
+
+    @property
+    def mu(self) -> int:
+        return self.label[self.root]
+
+    def energy(self) -> float:
+        # Labels are at most mu, so the sum only breaks ties between trees with the same mu
+        return self.mu + self.total / (len(self.nodes) * self.mu + 1)
+
+    def relabel(self, v: int) -> bool:
+        '''
+        Recomputes the label above v from the labels of its children, returns whether it changed.
+        '''
+        m = c = 0
+        for u in self.children[v]:
+            l = self.label[u]
+            if l > m:
+                m, c = l, 1
+            elif l == m:
+                c += 1
+        l = 1 if m == 0 else (m if c == 1 else m + 1)
+        if l == self.label[v]:
+            return False
+        self.total += l - self.label[v]
+        self.label[v] = l
+        return True
+
+    def relabel_up(self, v: int) -> None:
+        while v >= 0 and self.relabel(v):
+            v = self.parent[v]
+
+    def cycle(self, a: int, b: int) -> tuple[list, list]:
+        '''
+        Tree paths from a and from b up to (excluding) their lowest common ancestor.
+        '''
+        ancestors = set()
+        u = a
+        while u >= 0:
+            ancestors.add(u)
+            u = self.parent[u]
+        path_b = []
+        u = b
+        while u not in ancestors:
+            path_b.append(u)
+            u = self.parent[u]
+        path_a = []
+        v = a
+        while v != u:
+            path_a.append(v)
+            v = self.parent[v]
+        return path_a, path_b
+
+    def swap(self, a: int, b: int, x: int) -> int:
+        '''
+        Adds the tree edge (a, b) and removes the one above x, x being a or one of its ancestors on the cycle.
+        The subtree of x is rerooted at a and hung below b. Returns the former parent of x.
+        '''
+        p = self.parent[x]
+        self.children[p].discard(x)
+        path = [a]
+        while path[-1] != x:
+            path.append(self.parent[path[-1]])
+        for w, u in zip(path, path[1:]):
+            self.children[u].discard(w)
+            self.children[w].add(u)
+            self.parent[u] = w
+        self.parent[a] = b
+        self.children[b].add(a)
+
+        # The reversed path from its new bottom, then both attachment points up to the root
+        for u in reversed(path):
+            self.relabel(u)
+        self.relabel_up(p)
+        self.relabel_up(b)
+        return p
+
+    def step(self, temperature: float) -> None:
+        i = self.rng.integers(len(self.B))
+        a, b = self.B[i]
+        path_a, path_b = self.cycle(a, b)
+        k = self.rng.integers(len(path_a) + len(path_b))
+        if k >= len(path_a):
+            a, b, x = b, a, path_b[k - len(path_a)]
+        else:
+            x = path_a[k]
+
+        before = self.energy()
+        p = self.swap(a, b, x)
+        increase = self.energy() - before
+        self.iterations += 1
+        if increase <= 0 or (temperature > 0 and self.rng.random() < math.exp(-increase / temperature)):
+            self.B[i] = (min(x, p), max(x, p))
+            self.accepted += 1
+        else:
+            self.swap(x, p, a)
+
+    def run(self, budget: float) -> "LocalSearch":
+        '''
+        Runs the local search for budget seconds.
+        '''
+        started = time.time()
+        self.report(started)
+        if len(self.B) == 0:
+            return self
+        while (elapsed := time.time() - started) < budget:
+            if self.schedule == 'annealing':
+                temperature = self.temperature * (1 - elapsed / budget)
+            else:
+                temperature = 0
+            best_mu = int(self.best[0])
+            self.step(temperature)
+            if self.energy() < self.best[0]:
+                self.best = (self.energy(), list(self.parent))
+                if self.mu < best_mu:
+                    self.report(started)
+        return self
+
+    def report(self, started: float) -> None:
+        guards = None
+        if self.guards:
+            guards = count_guards(solver_copy(self.graph), *self.tree(self.parent))
+        self.progress.append((time.time() - started, self.mu, guards))
+
+    def tree(self, parent: list) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Parent array and preorder of the given tree.
+        '''
+        children = [[] for _ in parent]
+        for v, p in enumerate(parent):
+            if p >= 0:
+                children[p].append(v)
+        order = [self.root]
+        stack = [self.root]
+        while stack:
+            v = stack.pop()
+            order.extend(children[v])
+            stack.extend(children[v])
+        return np.array(parent, dtype=np.int64), np.array(order, dtype=np.int64)
+
+    def apply(self) -> "Graph":
+        '''
+        Sets the best tree found as the spanning tree of the graph.
+        '''
+        self.graph.set_spanning_tree(*self.tree(self.best[1]))
+        return self.graph
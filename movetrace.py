@@ -0,0 +1,71 @@
+import json
+
+VERSION = 2
+COLUMNS = ['step', 'robot', 'kind', 'from', 'to', 'delta', 'marker']
+
+class MoveTrace:
+    def __init__(self, target, graph_file: str=None) -> None:
+        '''
+        Append-only trace of the moves of a search, see the trace argument of GSST.
+        Every move is a JSON list [step, robot, kind, from, to, delta, marker] on its own line: the step whose state
+        has the move, the index of the searcher or guard, 'searcher' or 'guard', the nodes it moved from and to
+        (from is None for a robot appearing at 'sta'), the change of the label of the tree edge (from, to),
+        None for guards, and the id of the marker (see Searcher) a guard gets when it is put at 'sta', None otherwise.
+        The moves of a step are written and flushed when the step ends, so the trace can be
+        followed while the search runs. The first line is a header, the last one a footer once the search is done.
+        replay.py rebuilds the states of the run and renders it from the trace and the graph file.
+        Attributes:
+        - file:       Stream written to, a path given as target is opened for writing
+        - owned:      Whether the stream was opened here and is closed by close
+        - graph_file: Graph file (see graphfile) of the searched graph with its spanning tree, named in the header
+        - pending:    Lines of the step being searched
+        - moves:      Number of moves recorded
+        '''
+        self.owned = isinstance(target, str)
+        self.file = open(target, 'w') if self.owned else target
+        self.graph_file = graph_file
+        self.pending = []
+        self.moves = 0
+
+    def begin(self, solver) -> None:
+        '''
+        Writes the header: the starting state of the solver.
+        '''
+        sta = solver.engine.sta
+        header = {
+            'version': VERSION,
+            'columns': COLUMNS,
+            'variant': type(solver).__name__,
+            'graph': self.graph_file,
+            'nodes': solver.N,
+            'start': solver.graph.start,
+            'searchers': int(solver.searcher_per_locations[sta]),
+            'markers': [r.id for r in solver.searcher_per_locations_viz[sta]],
+            'guards': hasattr(solver, 'guard_per_locations'),
+        }
+        self.file.write(json.dumps(header) + '\n')
+        self.file.flush()
+
+    def record_move(self, step: int, kind: str, robot: int, src, dst, delta: int=None, marker: int=None) -> None:
+        self.pending.append(json.dumps([step, robot, kind, src, dst, delta, marker]))
+        self.moves += 1
+
+    def end_step(self) -> None:
+        if self.pending:
+            self.file.write('\n'.join(self.pending) + '\n')
+            self.pending = []
+        self.file.flush()
+
+    def close(self, solver=None) -> None:
+        '''
+        Writes the footer with the outcome of the search if the solver is given, and closes the stream if it was opened here.
+        '''
+        self.end_step()
+        if solver is not None:
+            footer = {'end': True, 'completed': not solver.to_visit, 'steps': solver.t, 'searchers': solver.num_searcher,
+                      'guards': getattr(solver, 'number_of_guards', 0), 'moves': self.moves}
+            self.file.write(json.dumps(footer) + '\n')
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
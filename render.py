@@ -0,0 +1,515 @@
+import imageio
+import numpy as np
+import networkx as nx
+import matplotlib.pyplot as plt
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.colors import to_rgba
+from graph import MARKER_RADIUS, robot_arrays, robot_markers
+from history import build_frame
+
+# State of a worker process, set once by init_worker
+worker = {}
+
+CHUNK = 8 # consecutive frames rendered per task, the first one from a full state and the others from deltas
+TILE = 16 # side in pixels of the tiles of the canvas, frames redraw the tiles where something changed
+
+NODE_COLORS = {'sta': to_rgba('red'), 'unvisited': to_rgba('grey'), 'visited': to_rgba('green'), 'current': to_rgba('cyan')}
+
+def gather(ptr: np.ndarray, values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    '''
+    Concatenation of the given rows of a CSR array.
+    '''
+    starts, ends = ptr[rows], ptr[rows + 1]
+    counts = ends - starts
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return values[offsets + np.arange(counts.sum())]
+
+def with_neighbor(indices: np.ndarray, count: int) -> np.ndarray:
+    '''
+    The given indices of elements of a collection of count elements, with a neighbor if there is only one.
+    matplotlib stamps a collection of a single element as a marker, which draws it a bit differently
+    than within the full collection.
+    '''
+    if len(indices) != 1 or count < 2:
+        return indices
+    i = indices[0]
+    return np.array([i, i + 1] if i + 1 < count else [i - 1, i])
+
+class Tiles:
+    def __init__(self, width: int, height: int, boxes: np.ndarray, owners: np.ndarray, count: int) -> None:
+        '''
+        Index of the elements of a collection by the tiles of the canvas they are drawn over.
+        boxes are display boxes (x0, y0, x1, y1) covering everything element owners[i] draws, count is the number of elements.
+        Attributes:
+        - shape:    Number of rows and columns of tiles, from the bottom left corner of the canvas as display coordinates
+        - of:       Tiles of every element, as a CSR array (ptr, tiles)
+        - over:     Elements drawn over every tile, in order, as a CSR array (ptr, elements)
+        '''
+        self.shape = (-(-height // TILE), -(-width // TILE))
+        tiles, box = self.tiles(boxes)
+        owners = np.asarray(owners)[box]
+        keys = np.unique(owners * (self.shape[0] * self.shape[1]) + tiles)
+        owners, tiles = np.divmod(keys, self.shape[0] * self.shape[1])
+        self.of = (np.searchsorted(owners, np.arange(count + 1)), tiles)
+        by_tile = np.argsort(tiles, kind='stable')
+        self.over = (np.searchsorted(tiles[by_tile], np.arange(self.shape[0] * self.shape[1] + 1)), owners[by_tile])
+
+    def tiles(self, boxes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Tiles overlapped by the given display boxes, with the index of the box overlapping each of them.
+        '''
+        rows, cols = self.shape
+        boxes = np.reshape(boxes, (-1, 4))
+        x0 = np.clip(np.floor(boxes[:, 0] / TILE), 0, cols - 1).astype(np.int64)
+        y0 = np.clip(np.floor(boxes[:, 1] / TILE), 0, rows - 1).astype(np.int64)
+        x1 = np.clip(np.floor(boxes[:, 2] / TILE), 0, cols - 1).astype(np.int64)
+        y1 = np.clip(np.floor(boxes[:, 3] / TILE), 0, rows - 1).astype(np.int64)
+        width, height = x1 - x0 + 1, y1 - y0 + 1
+        counts = width * height
+        box = np.repeat(np.arange(len(boxes)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return (y0[box] + k // width[box]) * cols + x0[box] + k % width[box], box
+
+    def reaching(self, dirty: np.ndarray) -> np.ndarray:
+        '''
+        Elements drawn over any of the dirty tiles, in order, see with_neighbor.
+        '''
+        return with_neighbor(np.unique(gather(*self.over, np.flatnonzero(dirty))), len(self.of[0]) - 1)
+
+class Renderer:
+    def __init__(self, graph: "Graph", robot=False) -> None:
+        '''
+        Renders the frames of a search on a graph with a spanning tree, exactly as Graph.visualize draws them.
+        The figure is set up once as Graph.visualize does, with persistent collections of the edges, nodes and robots.
+        Only the background (the figure, the axes and the image) is kept as a bitmap, the canvas keeps the previous frame.
+        Each frame restores the tiles of the canvas where something changed from the background and draws every element
+        over them, in the order of the axes: the persistent collections are given only those elements. Elements are drawn
+        whole, as in a full draw, and what they draw outside these tiles is put back, so a frame costs little more than what changed.
+        Attributes:
+        - graph:      The Graph being searched, its node attributes are only read for the initial frame
+        - robot:      Whether the robots are drawn instead of the edges and robot counts
+        - pos:        Position of every node
+        - order:      Index of every node in the node collection
+        - incident:   Indices of the edges of every node
+        - kind:       Type of every node as drawn: 'unvisited', 'visited' or 'current' (has robots)
+        - counts:     Robot count drawn on every node of type 'current', unless the robots are drawn
+        - robots:     Robots drawn at every node that has some
+        - changed:    Nodes whose type, count or robots changed since the last frame, with their robots before
+        - labels:     Text of the count of every node that has one
+        - background: Pixels of the canvas with only the figure, the axes and the image
+        - node_tiles: Tiles of the canvas every node is drawn over
+        - edge_tiles: Tiles of the canvas every edge is drawn over
+        - static:     Axis and spines, drawn above the edges and nodes, with their display boxes
+        '''
+        self.graph = graph
+        self.robot = robot and hasattr(graph, 'bg')
+        fig_size = getattr(graph, 'fig_size', (10, 10))
+        self.node_size = getattr(graph, 'node_size', 300)
+        self.pos = graph.layout(graph.t.g, k=3, seed=1)
+
+        # Set up as in Graph.visualize, so that the axes get the same limits
+        self.fig, self.ax = plt.subplots(1, 1, figsize=fig_size)
+        self.ax.set_xticks(np.arange(0, fig_size[0], 1))
+        self.ax.set_yticks(np.arange(0, fig_size[1], 1))
+        if hasattr(graph, 'bg'):
+            self.ax.imshow(graph.bg, extent=[0, fig_size[0], 0, fig_size[1]])
+        self.title = self.ax.set_title(' ', fontsize=17)
+
+        nodes = list(graph.g.nodes())
+        edges = list(graph.g.edges())
+        self.order = {n: i for i, n in enumerate(nodes)}
+        self.incident = {n: [] for n in nodes}
+        for i, (a, b) in enumerate(edges):
+            self.incident[a].append(i)
+            self.incident[b].append(i)
+        self.edge_nodes = edges
+        self.kind = {n: 'unvisited' for n in nodes}
+        self.counts = {}
+        self.robots = {}
+        self.changed = {}
+        self.labels = {}
+
+        self.xy = np.array([self.pos[n] for n in nodes], dtype=float)
+        self.node_colors = np.array([NODE_COLORS[self.node_color(n)] for n in nodes])
+        self.nodes = nx.draw_networkx_nodes(graph.g, pos=self.pos, node_color=self.node_colors, node_size=self.node_size, ax=self.ax)
+        self.markers = robot_markers(self.ax, self.pos, self.robots) if self.robot else None
+        self.edges = None
+        if not self.robot:
+            tree_edges = graph.t.g.edges()
+            self.styles = np.array(['-' if (a, b) in tree_edges or (b, a) in tree_edges else '--' for a, b in edges])
+            self.segments = self.xy[np.array([(self.order[a], self.order[b]) for a, b in edges], dtype=int).reshape(-1, 2)]
+            self.edge_colors = np.array([to_rgba('black')] * len(edges)).reshape(-1, 4)
+            self.edges = nx.draw_networkx_edges(graph.g, pos=self.pos, edge_color=self.edge_colors, style=self.styles, ax=self.ax, width=3)
+
+        canvas = self.fig.canvas
+        layers = [self.edges, self.nodes, *self.ax.spines.values(), self.ax.xaxis, self.ax.yaxis, self.title, self.markers]
+        layers = [layer for layer in layers if layer is not None]
+        for layer in layers:
+            layer.set_visible(False)
+        canvas.draw()
+        self.background = np.asarray(canvas.buffer_rgba()).view(np.uint32)[..., 0].copy()
+        for layer in layers:
+            layer.set_visible(True)
+        canvas.draw()
+
+        # Boxes covering what is drawn in display pixels, with room for antialiasing
+        renderer = canvas.get_renderer()
+        height, width = self.background.shape
+        scale = self.fig.dpi / 72
+        display = self.ax.transData.transform(self.xy).reshape(-1, 2)
+        radius = (np.sqrt(self.node_size) / 2 + self.nodes.get_linewidths()[0] / 2) * scale + 2
+        self.node_tiles = Tiles(width, height, np.hstack([display - radius, display + radius]), np.arange(len(nodes)), len(nodes))
+        if self.edges is not None:
+            # Boxes around points along every edge, every point of the edge being at most TILE/2 from one of them
+            ends = display[np.array([(self.order[a], self.order[b]) for a, b in edges], dtype=int).reshape(-1, 2)]
+            counts = np.maximum(np.ceil(np.linalg.norm(ends[:, 1] - ends[:, 0], axis=1) / TILE), 1).astype(np.int64)
+            owners = np.repeat(np.arange(len(edges)), counts)
+            t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 0.5) / counts[owners]
+            points = ends[owners, 0] + t[:, None] * (ends[owners, 1] - ends[owners, 0])
+            radius = self.edges.get_linewidths()[0] / 2 * scale + 2 + TILE / 2
+            self.edge_tiles = Tiles(width, height, np.hstack([points - radius, points + radius]), owners, len(edges))
+        if self.markers is not None:
+            origin, corner = self.ax.transData.transform([(0, 0), (MARKER_RADIUS, MARKER_RADIUS)])
+            self.marker_radius = np.abs(corner - origin) + self.markers.get_linewidths()[0] / 2 * scale + 2
+        self.static = [(artist, artist.get_window_extent(renderer).padded(2).extents)
+                       for artist in [*self.ax.spines.values(), self.ax.xaxis, self.ax.yaxis]]
+
+    def node_kind(self, attrs: dict) -> str:
+        if not attrs.get('visited', False):
+            return 'unvisited'
+        if attrs.get('searcher_number', 0) + attrs.get('guard_number', 0) > 0:
+            return 'current'
+        return 'visited'
+
+    def node_color(self, node) -> str:
+        if node == 'sta':
+            return 'sta'
+        if self.kind[node] == 'current' and self.robot:
+            return 'visited'
+        return self.kind[node]
+
+    def edge_color(self, i: int) -> tuple:
+        a, b = self.edge_nodes[i]
+        unvisited = (self.kind[a] == 'unvisited') + (self.kind[b] == 'unvisited')
+        return to_rgba(['green', 'cyan', 'black'][unvisited])
+
+    def update(self, nodes: dict) -> None:
+        '''
+        Applies the attributes of the given nodes, e.g. the nodes changed in a step of the History.
+        '''
+        for n, attrs in nodes.items():
+            kind = self.node_kind(attrs)
+            count = attrs.get('searcher_number', 0) + attrs.get('guard_number', 0) if kind == 'current' and not self.robot else None
+            robots = attrs.get('searcher_viz', []) + attrs.get('guard_viz', []) if self.robot else []
+            if kind == self.kind[n] and count == self.counts.get(n) and [r.id for r in robots] == [r.id for r in self.robots.get(n, [])]:
+                continue
+            self.changed.setdefault(n, self.robots.get(n, []))
+            self.kind[n] = kind
+            if count is None:
+                self.counts.pop(n, None)
+            else:
+                self.counts[n] = count
+            if robots:
+                self.robots[n] = robots
+            else:
+                self.robots.pop(n, None)
+
+    def text_box(self, text) -> np.ndarray:
+        return text.get_window_extent(self.fig.canvas.get_renderer()).padded(2).extents
+
+    def marker_arrays(self, robots: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        Centers, face colors and edge colors of the markers of the robots, in the order of the nodes as Graph.visualize
+        draws them, with the display boxes of the markers.
+        '''
+        robots = {n: robots[n] for n in sorted(robots, key=self.order.__getitem__)}
+        offsets, face_colors, edge_colors = robot_arrays(self.pos, robots)
+        centers = self.ax.transData.transform(offsets).reshape(-1, 2)
+        return offsets, face_colors, edge_colors, np.hstack([centers - self.marker_radius, centers + self.marker_radius])
+
+    def render(self, step: int) -> np.ndarray:
+        '''
+        RGB image of the current state, titled with the given step.
+        '''
+        dirty = np.zeros(self.node_tiles.shape, dtype=bool)
+        def mark(boxes) -> None:
+            dirty.flat[self.node_tiles.tiles(boxes)[0]] = True
+
+        title = f'Time: {step}\nRed: starting point     Green: cleared     Gray: may contain target'
+        if not self.robot:
+            title += '     Cyan: has searcher'
+        if title != self.title.get_text():
+            mark(self.text_box(self.title))
+            self.title.set_text(title)
+            mark(self.text_box(self.title))
+
+        edges = set()
+        for n, robots in self.changed.items():
+            i = self.order[n]
+            color = NODE_COLORS[self.node_color(n)]
+            if (self.node_colors[i] != color).any():
+                self.node_colors[i] = color
+                dirty.flat[gather(*self.node_tiles.of, np.array([i]))] = True
+            if not self.robot:
+                edges.update(self.incident[n])
+                label = self.labels.get(n)
+                if label is not None:
+                    mark(self.text_box(label))
+                    if n in self.counts:
+                        label.set_text(str(self.counts[n]))
+                    else:
+                        label.remove()
+                        del self.labels[n]
+                elif n in self.counts:
+                    self.labels.update(nx.draw_networkx_labels(self.graph.g, labels={n: self.counts[n]}, pos=self.pos, ax=self.ax))
+                if n in self.counts:
+                    mark(self.text_box(self.labels[n]))
+            else:
+                mark(self.marker_arrays({n: robots})[3])
+                mark(self.marker_arrays({n: self.robots.get(n, [])})[3])
+        recolored = [i for i in edges if (self.edge_colors[i] != self.edge_color(i)).any()]
+        for i in recolored:
+            self.edge_colors[i] = self.edge_color(i)
+        if recolored:
+            dirty.flat[gather(*self.edge_tiles.of, np.array(recolored))] = True
+        self.changed = {}
+
+        if dirty.any():
+            self.redraw(dirty)
+        return np.asarray(self.fig.canvas.buffer_rgba())[..., :3].copy()
+
+    def redraw(self, dirty: np.ndarray) -> None:
+        '''
+        Redraws the dirty tiles of the canvas: the background, then every element drawn over them, in the order
+        Graph.visualize draws them. These elements are drawn whole with the clipping they have in a full draw,
+        as Agg draws lines a bit differently when they are clipped, and what they drew outside the tiles is then put back.
+        '''
+        def over(box) -> bool:
+            return bool(dirty.flat[self.node_tiles.tiles(box)[0]].any())
+
+        layers, extents = [], []
+        if self.edges is not None:
+            edges = self.edge_tiles.reaching(dirty)
+            if len(edges):
+                self.edges.set_segments(self.segments[edges])
+                self.edges.set_color(self.edge_colors[edges])
+                self.edges.set_linestyle(self.styles[edges])
+                layers.append(self.edges)
+        nodes = self.node_tiles.reaching(dirty)
+        if len(nodes):
+            self.nodes.set_offsets(self.xy[nodes])
+            self.nodes.set_facecolor(self.node_colors[nodes])
+            layers.append(self.nodes)
+        if layers: # edges and nodes are clipped to the axes
+            extents.append(self.ax.bbox.padded(1).extents)
+        for artist, extent in self.static:
+            if over(extent):
+                layers.append(artist)
+                extents.append(extent)
+        for n in sorted(self.labels, key=self.order.__getitem__):
+            extent = self.text_box(self.labels[n])
+            if over(extent):
+                layers.append(self.labels[n])
+                extents.append(extent)
+        extent = self.text_box(self.title)
+        if over(extent):
+            layers.append(self.title)
+            extents.append(extent)
+        if self.markers is not None:
+            offsets, face_colors, edge_colors, marker_extents = self.marker_arrays(self.robots)
+            markers = with_neighbor(np.array([i for i, box in enumerate(marker_extents) if over(box)], dtype=int), len(marker_extents))
+            if len(markers):
+                self.markers.set_offsets(offsets[markers])
+                self.markers.set_facecolor(face_colors[markers])
+                self.markers.set_edgecolor(edge_colors[markers])
+                layers.append(self.markers)
+                extents.extend(marker_extents[markers])
+
+        # RGBA pixels as one integer each, in rows going down from the top of the canvas
+        buffer = np.asarray(self.fig.canvas.buffer_rgba()).view(np.uint32)[..., 0]
+        height, width = buffer.shape
+        mask = np.repeat(np.repeat(dirty, TILE, axis=0), TILE, axis=1)[:height, :width][::-1]
+        rows, cols = np.nonzero(dirty)
+        extents.append((cols.min() * TILE, rows.min() * TILE, (cols.max() + 1) * TILE, (rows.max() + 1) * TILE))
+        extents = np.array(extents, dtype=float)
+        x0, y0 = np.clip(np.floor(extents[:, :2].min(axis=0)).astype(int), 0, None)
+        x1, y1 = np.minimum(np.ceil(extents[:, 2:].max(axis=0)).astype(int), (width, height))
+        area = (slice(height - y1, height - y0), slice(x0, x1))
+        kept = buffer[area].copy()
+        np.copyto(buffer[area], self.background[area], where=mask[area])
+        renderer = self.fig.canvas.get_renderer()
+        for layer in layers:
+            layer.draw(renderer)
+        np.copyto(buffer[area], kept, where=~mask[area])
+
+    def close(self) -> None:
+        plt.close(self.fig)
+
+def cached(graph: "Graph") -> bool:
+    '''
+    Whether frames of the graph can be rendered by Renderer, i.e. it is a graph with a spanning tree.
+    '''
+    return hasattr(graph, 't') and not graph.is_tree()
+
+def render_frame(frame: "Graph", fn: str, step: int) -> None:
+    '''
+    Renders the plain and the robot frame of a step to {fn}_{step}.png and {fn}_{step}_robot.png.
+    '''
+    frame.visualize(save=True, filename=f'{fn}_{step}.png', step=step)
+    frame.visualize(save=True, filename=f'{fn}_{step}_robot.png', robot=True, step=step)
+
+def render_images(frame: "Graph", step: int) -> tuple:
+    '''
+    RGB images of the plain and the robot frame of a step.
+    '''
+    return (frame.visualize(step=step, image=True),
+            frame.visualize(robot=True, step=step, image=True))
+
+def init_worker(graph: "Graph", tree: "Graph") -> None:
+    plt.switch_backend('Agg')
+    worker.update(graph=graph, tree=tree)
+
+def render_state(step: int, nodes: dict, labels: dict) -> tuple:
+    return render_images(build_frame(worker['graph'], worker['tree'], nodes, labels), step)
+
+def render_chunk(steps: list, changes: list) -> list:
+    '''
+    Renders steps in order, changes holding the full node state or the changed nodes of every step.
+    The renderers of the worker are kept across chunks: frames are exact whatever they rendered before,
+    so they are the same as rendered in a single process.
+    '''
+    if 'renderers' not in worker:
+        worker['renderers'] = (Renderer(worker['graph']), Renderer(worker['graph'], robot=True))
+    frames = []
+    for step, changed in zip(steps, changes):
+        for renderer in worker['renderers']:
+            renderer.update(changed)
+        frames.append(tuple(renderer.render(step) for renderer in worker['renderers']))
+    return frames
+
+def visible(attrs: dict) -> tuple:
+    '''
+    What a frame shows of a node with the given attributes.
+    '''
+    robots = attrs.get('searcher_viz', []) + attrs.get('guard_viz', [])
+    return (attrs.get('visited', False), attrs.get('searcher_number', 0) + attrs.get('guard_number', 0), tuple(r.id for r in robots))
+
+def held_steps(history: "History", steps, hold=True) -> list:
+    '''
+    Groups the steps into (step, count): the frame of step is shown for count steps,
+    the count-1 steps after it not changing anything visible. Without hold every count is 1.
+    Consecutive steps are compared through the history deltas, so this is cheap next to rendering.
+    '''
+    groups = []
+    shown = None
+    for step in steps:
+        if groups and step == groups[-1][0] + groups[-1][1]:
+            if hold:
+                changed = {n: visible(attrs) for n, attrs in history.delta(step).nodes.items()}
+                if all(shown[n] == v for n, v in changed.items()):
+                    groups[-1][1] += 1
+                    continue
+                shown.update(changed)
+        elif hold:
+            shown = {n: visible(attrs) for n, attrs in history.state(step)[0].items()}
+        groups.append([step, 1])
+    return [tuple(group) for group in groups]
+
+def node_changes(history: "History", groups: list) -> list:
+    '''
+    Nodes to update before rendering every group: only the nodes changed in its step
+    if it directly follows the previous group, as the steps held in between change nothing visible.
+    '''
+    changes = []
+    end = None
+    for step, count in groups:
+        changes.append(history.delta(step).nodes if step == end else history.state(step)[0])
+        end = step + count
+    return changes
+
+def cached_images(history: "History", groups: list):
+    renderers = (Renderer(history.graph), Renderer(history.graph, robot=True))
+    try:
+        for (step, count), changed in zip(groups, node_changes(history, groups)):
+            for renderer in renderers:
+                renderer.update(changed)
+            yield (step, count, *(renderer.render(step) for renderer in renderers))
+    finally:
+        for renderer in renderers:
+            renderer.close()
+
+def images(history: "History", steps, workers: int=1, hold=True):
+    '''
+    Yields (step, count, plain image, robot image) for the given steps, in order.
+    With hold, steps that change nothing visible are not rendered: the frame of the step before them
+    is yielded once with count covering them, so it keeps the time of that step.
+    With workers > 1 the frames are rendered in that many processes, the graph and its background
+    are sent to every worker once and only the state of each step is sent per frame.
+    '''
+    groups = held_steps(history, steps, hold)
+    if workers == 1:
+        if cached(history.graph):
+            yield from cached_images(history, groups)
+        else:
+            for step, count in groups:
+                yield (step, count, *render_images(history[step], step))
+        return
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(history.graph, history.tree)) as pool:
+        # Only a few tasks ahead of the frame being consumed are in flight
+        pending = deque()
+        def submit(chunk):
+            if cached(history.graph):
+                return chunk, pool.submit(render_chunk, [step for step, _ in chunk], node_changes(history, chunk))
+            return chunk, pool.submit(render_state, chunk[0][0], *history.state(chunk[0][0]))
+
+        def results(chunk, future):
+            frames = future.result()
+            if not cached(history.graph):
+                frames = [frames]
+            for (step, count), (plain, robot) in zip(chunk, frames):
+                yield step, count, plain, robot
+
+        size = CHUNK if cached(history.graph) else 1
+        for i in range(0, len(groups), size):
+            if len(pending) >= 2 * workers:
+                yield from results(*pending.popleft())
+            pending.append(submit(groups[i:i+size]))
+        while pending:
+            yield from results(*pending.popleft())
+
+def render_frames(history: "History", fn: str, steps, workers: int=1, hold=True) -> None:
+    '''
+    Renders the frames of the given steps to {fn}_{step}.png and {fn}_{step}_robot.png,
+    held frames are written again under the steps they cover.
+    '''
+    for step, count, plain, robot in images(history, steps, workers, hold):
+        for held in range(step, step + count):
+            imageio.imwrite(f'{fn}_{held}.png', plain)
+            imageio.imwrite(f'{fn}_{held}_robot.png', robot)
+
+def write_videos(history: "History", fn: str, steps, workers: int=1, png=False, fps: int=2, hold=True) -> None:
+    '''
+    Streams the frames of the given steps into {fn}.mp4 and {fn}_robot.mp4 as they are rendered,
+    only one frame is held in memory and nothing goes through the disk unless png=True,
+    in which case the frames are also written as in render_frames.
+    A held frame is rendered once and passed to the encoder for every step it covers, keeping the video timing.
+    '''
+    with imageio.get_writer(f'{fn}.mp4', fps=fps) as plain_writer, imageio.get_writer(f'{fn}_robot.mp4', fps=fps) as robot_writer:
+        for step, count, plain, robot in images(history, steps, workers, hold):
+            for held in range(step, step + count):
+                plain_writer.append_data(plain)
+                robot_writer.append_data(robot)
+                if png:
+                    imageio.imwrite(f'{fn}_{held}.png', plain)
+                    imageio.imwrite(f'{fn}_{held}_robot.png', robot)
+
+def write_videos_from_frames(fn: str, steps, fps: int=2) -> None:
+    '''
+    Streams frames already rendered by render_frames into {fn}.mp4 and {fn}_robot.mp4, one at a time.
+    '''
+    for suffix in ['', '_robot']:
+        with imageio.get_writer(f'{fn}{suffix}.mp4', fps=fps) as writer:
+            for step in steps:
+                writer.append_data(imageio.imread(f'{fn}_{step}{suffix}.png'))
@@ -0,0 +1,134 @@
+'''
+Rebuilds the states of a search from its move trace (see movetrace.py) and renders its videos,
+so that a run planned on one machine can be rendered on another, and the search keeps no history in memory.
+
+    python solve.py --floor-plan gates --trace runs/gates.jsonl
+    python replay.py runs/gates.jsonl --background gates --output demo/gates
+
+The graph and its spanning tree come from the graph file named in the trace, looked up next to the trace.
+'''
+import argparse
+import json
+import os
+import sys
+from graphfile import GraphFile
+from gsst import Searcher
+from history import History
+
+def read_trace(source) -> tuple[dict, "Iterator"]:
+    '''
+    Header of the trace read from the source, a path or a stream of lines, and an iterator over the rest of its lines
+    (the moves, then the footer if the search returned).
+    '''
+    stream = open(source) if isinstance(source, str) else source
+    lines = (json.loads(line) for line in stream if line.strip())
+    return next(lines), lines
+
+def trace_graph(source, header: dict) -> "Graph":
+    '''
+    Graph of the graph file named in the header, a relative path being looked up next to the trace first.
+    '''
+    path = header.get('graph')
+    if path is None:
+        raise ValueError('The trace names no graph file, give the graph to replay it on')
+    if isinstance(source, str) and not os.path.isabs(path):
+        beside = os.path.join(os.path.dirname(source), path)
+        if os.path.exists(beside):
+            path = beside
+    return GraphFile(path).graph()
+
+def replay(source, graph: "Graph"=None, history_options: dict=None) -> tuple[History, dict]:
+    '''
+    Replays the trace on the graph (by default the one of its graph file), doing to the node attributes
+    what the solver did, and returns the History of the run as GSST.history would hold it, with the footer
+    of the trace (None if the search never returned, e.g. its process was killed). history_options are passed on to History.
+    '''
+    header, lines = read_trace(source)
+    if graph is None:
+        graph = trace_graph(source, header)
+    g = graph.g
+    for n in g:
+        attrs = g.nodes[n]
+        attrs.update(searcher_number=0, visited=n == 'sta', searcher_viz=[])
+        if header['guards']:
+            attrs.update(guard_number=0, guard_viz=[])
+    g.nodes['sta']['searcher_number'] = header['searchers']
+    g.nodes['sta']['searcher_viz'] = [Searcher(id=i) for i in header['markers']]
+    marker = max(header['markers'], default=-1) # traces of version 1 have no marker column, their markers follow the searchers
+
+    history = History(graph, graph.t, **(history_options or {}))
+    history.save(set())
+    labels = dict(history.head[1])
+    touched, footer = set(), None
+    for row in lines:
+        if isinstance(row, dict):
+            footer = row
+            break
+        step, robot, kind, src, dst, delta = row[:6]
+        while len(history) < step: # close the steps before this move
+            history.save(touched)
+            touched = set()
+        history.record_move(kind, robot, src, dst)
+        touched.update(n for n in (src, dst) if n is not None)
+
+        if kind == 'searcher':
+            g.nodes[dst]['searcher_number'] += 1
+            if src is None: # new searcher of Algorithm 6, without a marker
+                continue
+            g.nodes[src]['searcher_number'] -= 1
+            g.nodes[dst]['searcher_viz'].append(g.nodes[src]['searcher_viz'].pop(0))
+            if not g.nodes[dst]['visited']:
+                g.nodes[dst]['visited'] = True
+                history.record_visit(dst)
+            labels[(src, dst)] += delta
+            history.record_label((src, dst), labels[(src, dst)])
+        elif dst == 'sta': # guard added or freed, it gets a new marker at 'sta'
+            if src is not None:
+                g.nodes[src]['guard_number'] -= 1
+                g.nodes[src]['guard_viz'].pop(0)
+            marker = row[6] if len(row) > 6 else marker + 1
+            g.nodes['sta']['guard_number'] += 1
+            g.nodes['sta']['guard_viz'].append(Searcher(guard=True, id=marker))
+        else: # guard sent from 'sta'
+            g.nodes[src]['guard_number'] -= 1
+            g.nodes[dst]['guard_number'] += 1
+            g.nodes[dst]['guard_viz'].append(g.nodes[src]['guard_viz'].pop(0))
+
+    last = footer['steps'] if footer is not None else len(history) - (0 if touched else 1)
+    while len(history) <= last:
+        history.save(touched)
+        touched = set()
+    return history, footer
+
+def main(argv=None) -> int:
+    from solve import FLOOR_PLANS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('trace', help='move trace written by the search, - for the standard input')
+    parser.add_argument('--graph', help='graph file to replay on instead of the one named in the trace')
+    parser.add_argument('--background', choices=FLOOR_PLANS,
+                        help='floor plan whose background image is drawn')
+    parser.add_argument('--output', help='file name prefix of the videos, only the outcome is printed if not given')
+    parser.add_argument('--workers', type=int, default=1, help='processes rendering the frames')
+    parser.add_argument('--fps', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.trace == '-' else args.trace
+    graph = None if args.graph is None else GraphFile(args.graph).graph()
+    history, footer = replay(source, graph)
+    if footer is None:
+        print(f'The search did not finish, {len(history)} steps replayed')
+    elif not footer.get('completed', True):
+        print(f"The search was stopped after {footer['steps']} steps")
+    else:
+        print(f"Searchers: {footer['searchers']}, guards: {footer['guards']}, steps: {footer['steps']}, moves: {footer['moves']}")
+
+    if args.output is not None:
+        from render import write_videos
+        if args.background is not None:
+            import importlib
+            history.graph.bg = importlib.import_module(f'graphs.{args.background}').bg
+        write_videos(history, args.output, range(len(history)), args.workers, fps=args.fps)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
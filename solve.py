@@ -0,0 +1,86 @@
+'''
+Headless entry point: solves one graph and prints the number of searchers, guards and steps.
+Plotting, video and image libraries are only loaded with --visualize.
+
+    python solve.py --floor-plan gates
+    python solve.py --family grid --size 10000 --seed 3 --variant GSST
+    python solve.py --floor-plan hallway --visualize --output demo/hallway
+    python solve.py --family grid --size 100000 --trace runs/grid.jsonl
+'''
+import argparse
+import importlib
+import logging
+import os
+import sys
+
+FLOOR_PLANS = ['gallery_of_art', 'gates', 'hallway', 'simon_hall']
+HISTORY_MEMORY = 64 * 2**20 # bytes of history kept in memory while tracing, the trace holds the rest
+
+def floor_plan(name: str, visualize=False) -> "Graph":
+    '''
+    Graph of one of the floor plans in graphs/, with its background only if it is visualized.
+    '''
+    from graph import Graph
+    plan = importlib.import_module(f'graphs.{name}')
+    graph = Graph(plan.edges, pos=plan.locations)
+    graph.add_sta(sta=1)
+    graph.pos['sta'] = plan.sta
+    graph.fig_size = plan.fig_size
+    graph.node_size = 1000
+    if visualize:
+        graph.bg = plan.bg
+    return graph
+
+def main(argv=None) -> int:
+    from experiments import FAMILIES, make_graph
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--floor-plan', choices=FLOOR_PLANS)
+    source.add_argument('--family', choices=FAMILIES, default='random')
+    parser.add_argument('--size', type=int, default=100)
+    parser.add_argument('--k', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tree-cache', nargs='?', const=True, default=None, metavar='DIR',
+                        help='reuse the spanning tree of the floor plan from a disk cache (default directory if DIR is not given)')
+    parser.add_argument('--max-steps', type=int, help='stop the search after this many steps (5 per node by default)')
+    parser.add_argument('--max-seconds', type=float, help='stop the search after this many seconds')
+    parser.add_argument('--variant', choices=['GSST', 'GSST_L', 'GSST_R'], default='GSST_L')
+    parser.add_argument('--visualize', action='store_true', help='write the videos of the run')
+    parser.add_argument('--workers', type=int, default=1, help='processes rendering the frames')
+    parser.add_argument('--output', default='test_run', help='file name prefix of the videos')
+    parser.add_argument('--trace', metavar='FILE', help='stream the moves to FILE (JSON lines) and save the graph next to it, '
+                        'for replay.py. The history kept in memory is then bounded unless visualizing')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    import gsst
+    if args.floor_plan is not None:
+        graph = floor_plan(args.floor_plan, args.visualize)
+        cache = None
+        if args.tree_cache is not None:
+            from treecache import TreeCache
+            cache = TreeCache() if args.tree_cache is True else TreeCache(args.tree_cache)
+        graph.generate_random_spanning_tree(seed=args.seed, cache=cache)
+    else:
+        graph = make_graph(args.family, args.size, args.k, args.seed)
+
+    trace = None
+    history_options = None
+    if args.trace is not None:
+        from movetrace import MoveTrace
+        graph_file = os.path.splitext(args.trace)[0] + '.gsst'
+        graph.save(graph_file)
+        trace = MoveTrace(args.trace, os.path.basename(graph_file))
+        if not args.visualize:
+            history_options = dict(max_memory=HISTORY_MEMORY)
+
+    solver = getattr(gsst, args.variant)(graph=graph, filename=args.output, history_options=history_options, trace=trace)
+    result = solver.search(max_steps=args.max_steps, max_seconds=args.max_seconds)
+    print(f'Searchers: {result.searchers}, guards: {result.guards}, steps: {result.steps}, seconds: {result.seconds:.3f}'
+          + ('' if result.completed else f', stopped at {result.stopped} with {len(result.to_visit)} nodes to visit'))
+    if args.visualize:
+        solver.visualize(workers=args.workers)
+    return 0 if result.completed else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,7 @@
 from graph import Graph
 from gsst import GSST, GSST_L, GSST_R
+import logging
 import os
-import pickle
 
 fn = 'gif/{}'
 
@@ -13,9 +13,12 @@ def test_trees(rep=10):
         G.add_sta()
         G.generate_random_spanning_tree()
         G.t.visualize(save=True, filename=fn.format(f'{idx}_tree.png'))
-        pickle.dump(G, open(f'gif/{idx}_graph.pkl', 'wb'))
+        G.save(f'gif/{idx}_graph.gsst')
         gsst = GSST(tree=G.t, filename=fn.format(idx))
-        gsst.search(visualize=True)
+        result = gsst.search(visualize=True)
+        if not result.completed:
+            print(f'INTERRUPTED! {result}')
+            continue
         print(f'COMPLETED!\nTime: {gsst.t}, Number of searchers: {gsst.num_searcher}')
         gsst.visualize()    
 
@@ -27,9 +30,12 @@ def test_GSST_L(rep=10):
         G.add_sta()
         G.generate_random_spanning_tree()
         G.visualize(save=True, filename=fn.format(f'{idx}_graph.png'))
-        pickle.dump(G, open(f'gif/{idx}_graph.pkl', 'wb'))
+        G.save(f'gif/{idx}_graph.gsst')
         gsst_l = GSST_L(graph=G, filename=fn.format(idx))
-        gsst_l.search(visualize=True)
+        result = gsst_l.search(visualize=True)
+        if not result.completed:
+            print(f'INTERRUPTED! {result}')
+            continue
         print(f'COMPLETED!\nTime: {gsst_l.t}, Number of searchers: {gsst_l.num_searcher}, Number of guards: {gsst_l.number_of_guards}')
         gsst_l.visualize()
 
@@ -41,7 +47,7 @@ def test_GSST_R(rep=10):
         G.add_sta()
         G.generate_random_spanning_tree()
         G.visualize(save=True, filename=fn.format(f'{idx}_graph.png'))
-        pickle.dump(G, open(f'gif/{idx}_graph.pkl', 'wb'))
+        G.save(f'gif/{idx}_graph.gsst')
         gsst_r = GSST_R(graph=G, filename=fn.format(idx))
         gsst_r.search()
         import networkx as nx
@@ -52,6 +58,7 @@ def test_GSST_R(rep=10):
         plt.savefig("test.png", format="PNG")
 
 def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     # test_trees(10)
     test_GSST_L(5)
     # test_GSST_R(1)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from engine import label_tree, random_spanning_tree
+from graph import Graph
+from gsst import GSST, GSST_L
+
+# (completed, steps, searchers, guards) of GSST and GSST_L, as given by the implementation on networkx graphs
+RUNS = {
+    'random-0': ((True, 29, 2, 0), (True, 29, 2, 7)),
+    'random-1': ((True, 28, 2, 0), (True, 28, 2, 5)),
+    'random-2': ((True, 29, 2, 0), (True, 29, 2, 5)),
+    'random-3': ((True, 28, 2, 0), (True, 28, 2, 4)),
+    'gates-3':  ((True, 40, 3, 0), (True, 40, 3, 3)),
+}
+
+def make_graph(name: str) -> Graph:
+    family, seed = name.split('-')
+    seed = int(seed)
+    if family == 'gates':
+        from solve import floor_plan
+        graph = floor_plan('gates')
+    else:
+        graph = Graph(Graph.random_graph(25, 3, seed))
+        graph.add_sta()
+    graph.generate_random_spanning_tree(seed=seed)
+    return graph
+
+def reference_labels(parent) -> tuple[list, int]:
+    '''
+    Algorithm 2 from its definition: a leaf edge is labeled 1, any other edge gets the largest label below it,
+    plus one if that label appears more than once.
+    '''
+    children = [[] for _ in parent]
+    for v, p in enumerate(parent):
+        if p >= 0:
+            children[p].append(v)
+
+    def label(v):
+        below = [label(c) for c in children[v]]
+        if not below:
+            return 1
+        m = max(below)
+        return m if below.count(m) == 1 else m + 1
+
+    root = list(parent).index(-1)
+    return [0 if v == root else label(v) for v in range(len(parent))], label(root)
+
+def test_label_tree_small():
+    #       0
+    #     /   \
+    #    1     2
+    #   / \    |
+    #  3   4   5
+    parent = [-1, 0, 0, 1, 1, 2]
+    label, mu = label_tree(parent, [0, 1, 2, 3, 4, 5])
+    assert label.tolist() == [0, 2, 1, 1, 1, 1]
+    assert mu == 2
+
+@pytest.mark.parametrize('seed', range(20))
+def test_label_tree_matches_definition(seed):
+    graph = Graph(Graph.random_graph(40, 3, seed))
+    graph.add_sta()
+    nodes, ptr, adj = graph.adjacency()
+    parent, order = random_spanning_tree(ptr, adj, nodes.index('sta'), np.random.default_rng(seed))
+    label, mu = label_tree(parent, order)
+    expected, expected_mu = reference_labels(parent.tolist())
+    assert label.tolist() == expected
+    assert mu == expected_mu
+
+@pytest.mark.parametrize('name', RUNS)
+def test_tree_labels(name):
+    graph = make_graph(name)
+    nodes, ptr, adj = graph.adjacency()
+    parent, order = random_spanning_tree(ptr, adj, nodes.index('sta'), np.random.default_rng(int(name.split('-')[1])))
+    expected, mu = reference_labels(parent.tolist())
+    assert graph.t.mu == mu
+    for v, p in enumerate(parent.tolist()):
+        if p >= 0:
+            assert graph.t.g.edges[nodes[p], nodes[v]]['label'] == expected[v]
+            assert graph.t.g.edges[nodes[v], nodes[p]]['label'] == -expected[v]
+
+@pytest.mark.parametrize('name', RUNS)
+@pytest.mark.parametrize('variant', [GSST, GSST_L])
+def test_search(name, variant):
+    result = variant(graph=make_graph(name)).search()
+    expected = RUNS[name][variant is GSST_L]
+    assert (result.completed, result.steps, result.searchers, result.guards) == expected
+    assert not result.to_visit
@@ -0,0 +1,51 @@
+import networkx as nx
+import numpy as np
+import pytest
+from experiments import make_graph
+from graph import Graph
+from graphfile import GraphFile
+from gsst import GSST_L
+
+def outcome(graph: Graph) -> tuple:
+    result = GSST_L(graph=graph).search()
+    return result.completed, result.steps, result.searchers, result.guards
+
+@pytest.mark.parametrize('family', ['random', 'grid', 'corridor'])
+def test_round_trip(tmp_path, family):
+    graph = make_graph(family, 200, 3, 1)
+    path = str(tmp_path / 'graph.gsst')
+    graph.save(path)
+    loaded = Graph.load(path)
+
+    # Same nodes and neighbors, in the same order
+    assert list(loaded.g.nodes()) == list(graph.g.nodes())
+    for n in graph.g:
+        assert list(loaded.g[n]) == list(graph.g[n])
+    assert loaded.start == graph.start
+    if graph.pos is not None:
+        assert loaded.pos.keys() == graph.pos.keys()
+        assert all(np.allclose(loaded.pos[n], graph.pos[n]) for n in graph.pos)
+
+    # Same labeled spanning tree and non-tree edges
+    assert loaded.t.mu == graph.t.mu
+    assert list(loaded.t.g.nodes()) == list(graph.t.g.nodes())
+    for n in graph.t.g:
+        assert list(loaded.t.g[n]) == list(graph.t.g[n])
+    assert nx.get_edge_attributes(loaded.t.g, 'label') == nx.get_edge_attributes(graph.t.g, 'label')
+    assert sorted(loaded.B) == sorted(graph.B)
+
+    assert outcome(loaded) == outcome(graph)
+
+def test_sampled_trees(tmp_path):
+    graph = make_graph('random', 100, 3, 2)
+    parents, orders, mus = graph.sample_spanning_trees(5, seed=2)
+    path = str(tmp_path / 'trees.gsst')
+    graph.save(path, parents, orders)
+    file = GraphFile(path)
+    assert len(file) == 6 # the spanning tree of the graph first
+    assert file.mus.tolist() == [graph.t.mu] + mus.tolist()
+    for k in range(5):
+        parent, order = file.tree(k + 1)
+        assert parent.tolist() == parents[k].tolist()
+        assert order.tolist() == orders[k].tolist()
+        assert Graph.load(path, k + 1).t.mu == mus[k]
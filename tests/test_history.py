@@ -0,0 +1,86 @@
+import random
+import pytest
+from experiments import make_graph
+from gsst import GSST, GSST_L, Searcher
+from history import History, RECORD_BYTES
+
+def run(variant, history_options=None) -> tuple["History", int, int]:
+    '''
+    History of a search, the id of its first robot (every run takes new ones) and the most memory it used after a step.
+    '''
+    graph = make_graph('random', 30, 3, 1)
+    first_id = Searcher.sid + 1
+    solver = variant(graph=graph, history_options=history_options)
+    history = solver.history
+    peak = [history.memory()]
+    def save(nodes) -> None:
+        History.save(history, nodes)
+        peak.append(history.memory())
+    history.save = save
+    assert solver.search().completed
+    return history, first_id, max(peak)
+
+def comparable(state: tuple, first_id: int) -> tuple:
+    '''
+    Node attributes and labels of a History state, robots given by their ids counted from the first robot of the run.
+    '''
+    nodes, labels = state
+    nodes = {n: {k: [r.id - first_id for r in v] if k.endswith('_viz') else v for k, v in attrs.items()}
+             for n, attrs in nodes.items()}
+    return nodes, labels
+
+@pytest.fixture(scope='module', params=[GSST, GSST_L])
+def reference(request):
+    history, first_id, _ = run(request.param)
+    return request.param, [comparable(history.state(step), first_id) for step in range(len(history))]
+
+@pytest.mark.parametrize('variant', [GSST, GSST_L])
+def test_delta_round_trip(variant):
+    history, first_id, _ = run(variant, dict(window=1000))
+    assert list(history.checkpoints) == [0]
+    previous = history.state(0)
+    for step in range(1, len(history)):
+        delta = history.delta(step)
+        current = history.state(step)
+        nodes, labels = (dict(x) for x in previous)
+        nodes.update(delta.nodes)
+        labels.update(delta.labels)
+        assert comparable((nodes, labels), first_id) == comparable(current, first_id)
+        assert all(current[0][n]['visited'] and not previous[0][n]['visited'] for n in delta.visited)
+        # Within the recent window, the previous step is rebuilt backwards from the delta
+        nodes, labels = (dict(x) for x in current)
+        nodes.update(delta.before[0])
+        labels.update(delta.before[1])
+        assert comparable((nodes, labels), first_id) == comparable(previous, first_id)
+        previous = current
+    with pytest.raises(IndexError):
+        history.delta(0)
+    with pytest.raises(IndexError):
+        history.state(len(history))
+
+@pytest.mark.parametrize('max_memory', [None, 5000, 20000, 60000, 10**6])
+@pytest.mark.parametrize('window', [0, 1, 5])
+@pytest.mark.parametrize('checkpoint_every', [None, 1, 3, 10])
+def test_bounded_history(reference, checkpoint_every, window, max_memory):
+    variant, states = reference
+    history, first_id, peak = run(variant, dict(checkpoint_every=checkpoint_every, window=window, max_memory=max_memory))
+    assert len(history) == len(states)
+    if max_memory is not None and max_memory > 2 * history.state_size() * RECORD_BYTES:
+        assert peak <= max_memory
+    else:
+        # Below the size of two states nothing is dropped
+        assert history.first == 0
+
+    steps = list(range(history.first, len(history)))
+    shuffled = steps[:]
+    random.Random(0).shuffle(shuffled)
+    for step in steps + steps[::-1] + shuffled:
+        assert comparable(history.state(step), first_id) == states[step]
+    assert comparable(history.state(-1), first_id) == states[-1]
+    for step in range(history.first):
+        with pytest.raises(IndexError):
+            history.state(step)
+        with pytest.raises(IndexError):
+            history.delta(step)
+    with pytest.raises(IndexError):
+        history.delta(history.first)
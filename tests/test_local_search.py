@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from collections import deque
+from engine import label_tree, random_spanning_tree, reroot_labels
+from graph import Graph
+from local_search import LocalSearch
+
+def make_graph(n: int, seed: int) -> Graph:
+    graph = Graph(Graph.random_graph(n, 4, seed))
+    graph.add_sta()
+    graph.generate_random_spanning_tree(seed=seed)
+    return graph
+
+def check_labels(search: LocalSearch) -> None:
+    '''
+    The incremental labels of the local search are the ones of labeling its current tree from scratch.
+    '''
+    parent, order = search.tree(search.parent)
+    label, mu = label_tree(parent, order)
+    expected = label.tolist()
+    expected[search.root] = mu
+    assert search.label == expected
+    assert search.total == sum(expected)
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('temperature', [0, 10])
+def test_swaps_keep_labels(seed, temperature):
+    graph = make_graph(40, seed)
+    search = LocalSearch(graph, seed=seed)
+    check_labels(search)
+    edges = {frozenset(e) for e in graph.g.edges()}
+    for _ in range(200):
+        search.step(temperature)
+        check_labels(search)
+    # The tree and the non-tree edges still split the edges of the graph
+    tree = {frozenset((search.parent[v], v)) for v in range(len(search.nodes)) if search.parent[v] >= 0}
+    B = {frozenset(b) for b in search.B}
+    assert len(tree) == len(search.nodes) - 1
+    assert not tree & B
+    assert {frozenset(search.nodes[v] for v in e) for e in tree | B} == edges
+
+def test_swap_and_back():
+    graph = make_graph(30, 7)
+    search = LocalSearch(graph, seed=7)
+    parent, label = list(search.parent), list(search.label)
+    a, b = search.B[0]
+    path_a, path_b = search.cycle(a, b)
+    if not path_a: # a is an ancestor of b
+        a, b, path_a = b, a, path_b
+    x = path_a[-1]
+    p = search.swap(a, b, x)
+    check_labels(search)
+    search.swap(x, p, a)
+    assert search.parent == parent
+    assert search.label == label
+
+def rooted(parent: np.ndarray, root: int) -> tuple[np.ndarray, list]:
+    '''
+    The same tree rooted at root, as a parent array and a BFS order.
+    '''
+    neighbors = [[] for _ in parent]
+    for v, p in enumerate(parent.tolist()):
+        if p >= 0:
+            neighbors[v].append(p)
+            neighbors[p].append(v)
+    new = np.full(len(parent), -1, dtype=np.int64)
+    order = [root]
+    queue = deque([root])
+    while queue:
+        v = queue.popleft()
+        for u in neighbors[v]:
+            if u != root and new[u] < 0:
+                new[u] = v
+                order.append(u)
+                queue.append(u)
+    return new, order
+
+@pytest.mark.parametrize('seed', range(20))
+def test_reroot_labels(seed):
+    rng = np.random.default_rng(seed)
+    graph = Graph(Graph.random_graph(int(rng.integers(1, 30)) + 1, 3, seed))
+    _, ptr, adj = graph.adjacency()
+    parent, order = random_spanning_tree(ptr, adj, 0, rng)
+    mu = reroot_labels(parent, order)
+    for root in range(len(parent)):
+        assert mu[root] == label_tree(*rooted(parent, root))[1]
@@ -0,0 +1,68 @@
+import io
+import pytest
+from experiments import make_graph
+from gsst import GSST, GSST_L
+from movetrace import MoveTrace
+from replay import read_trace, replay
+
+def comparable(state: tuple) -> tuple:
+    '''
+    Node attributes and labels of a History state, robots given by their ids.
+    '''
+    nodes, labels = state
+    nodes = {n: {k: [r.id for r in v] if k.endswith('_viz') else v for k, v in attrs.items()} for n, attrs in nodes.items()}
+    return nodes, labels
+
+@pytest.mark.parametrize('variant', [GSST, GSST_L])
+@pytest.mark.parametrize('family', ['random', 'grid'])
+def test_replay_matches_history(tmp_path, variant, family):
+    graph = make_graph(family, 150, 3, 4)
+    trace_path = str(tmp_path / 'run.jsonl')
+    graph.save(str(tmp_path / 'run.gsst'))
+    solver = variant(graph=graph, trace=MoveTrace(trace_path, 'run.gsst'))
+    result = solver.search()
+
+    history, footer = replay(trace_path)
+    assert footer['completed'] == result.completed
+    assert (footer['steps'], footer['searchers'], footer['guards']) == (result.steps, result.searchers, result.guards)
+    assert len(history) == len(solver.history)
+    for step in range(len(history)):
+        assert comparable(history.state(step)) == comparable(solver.history.state(step))
+        if step > 0:
+            assert history.delta(step).moves == solver.history.delta(step).moves
+            assert history.delta(step).visited == solver.history.delta(step).visited
+
+def test_unfinished_trace(tmp_path):
+    graph = make_graph('random', 100, 3, 5)
+    stream = io.StringIO()
+    solver = GSST_L(graph=graph, trace=MoveTrace(stream))
+    result = solver.search(max_steps=10)
+    assert not result.completed
+
+    header, lines = read_trace(io.StringIO(stream.getvalue()))
+    assert header['variant'] == 'GSST_L'
+    rows = list(lines)
+    assert rows[-1]['end'] and rows[-1]['steps'] == 10 and not rows[-1]['completed']
+
+    # Without the footer, as if the search was killed, the steps recorded so far are replayed
+    truncated = stream.getvalue().splitlines(keepends=True)[:-1]
+    history, footer = replay(io.StringIO(''.join(truncated)), make_graph('random', 100, 3, 5))
+    assert footer is None
+    assert len(history) <= len(solver.history)
+    for step in range(len(history)):
+        assert comparable(history.state(step)) == comparable(solver.history.state(step))
+
+def test_replay_with_markers_taken_meanwhile(tmp_path):
+    # Marker ids are global: robots created between building the solver and searching must not shift the guards
+    graph = make_graph('grid', 150, 3, 4)
+    trace_path = str(tmp_path / 'run.jsonl')
+    graph.save(str(tmp_path / 'run.gsst'))
+    solver = GSST_L(graph=graph, trace=MoveTrace(trace_path, 'run.gsst'))
+    GSST_L(graph=make_graph('grid', 150, 3, 5))
+    result = solver.search()
+    assert result.guards > 0
+
+    history, _ = replay(trace_path)
+    assert len(history) == len(solver.history)
+    for step in range(len(history)):
+        assert comparable(history.state(step)) == comparable(solver.history.state(step))
@@ -0,0 +1,37 @@
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pytest
+from experiments import make_graph
+from gsst import GSST_L
+from render import Renderer, images
+
+def run(background: bool) -> "History":
+    graph = make_graph('random', 30, 3, 1)
+    if background:
+        graph.bg = np.random.default_rng(1).random((20, 20, 3))
+    solver = GSST_L(graph=graph)
+    assert solver.search().completed
+    return solver.history
+
+@pytest.mark.parametrize('robot, background', [(False, False), (False, True), (True, True)])
+def test_frames_match_visualize(robot, background):
+    history = run(background)
+    renderer = Renderer(history.graph, robot=robot)
+    try:
+        for step in range(len(history)):
+            renderer.update(history.state(step)[0] if step == 0 else history.delta(step).nodes)
+            frame = renderer.render(step)
+            expected = history[step].visualize(step=step, robot=robot, image=True)
+            assert np.array_equal(frame, expected), f'{np.count_nonzero((frame != expected).any(axis=-1))} pixels differ at step {step}'
+    finally:
+        renderer.close()
+
+def test_parallel_frames_match_serial():
+    history = run(background=True)
+    steps = range(len(history))
+    serial = list(images(history, steps, 1))
+    parallel = list(images(history, steps, 2))
+    assert [(step, count) for step, count, _, _ in parallel] == [(step, count) for step, count, _, _ in serial]
+    for (step, _, *frames), (_, _, *expected) in zip(parallel, serial):
+        assert all(np.array_equal(a, b) for a, b in zip(frames, expected)), f'frames differ at step {step}'
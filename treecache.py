@@ -0,0 +1,113 @@
+import hashlib
+import os
+import numpy as np
+from graphfile import map_arrays, write_arrays
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'gsst', 'trees')
+MAX_BYTES = 256 * 2**20
+
+class TreeCache:
+    def __init__(self, path: str=DEFAULT_PATH, max_bytes: int=MAX_BYTES) -> None:
+        '''
+        Disk cache of labeled spanning trees keyed by the content of the graph, so that planning again
+        for the same map does not generate and label its tree again, see Graph.generate_random_spanning_tree.
+        Every entry is a file in the format of graphfile holding the parent array, the preorder,
+        the labels of the tree (as per Algorithm 2), its number of searchers mu and its non-tree edges B.
+        Entries are memory mapped when read. When the entries take more than max_bytes,
+        the least recently used ones are removed.
+        Attributes:
+        - path:      Directory of the entries, created on the first store
+        - max_bytes: Size the entries are kept under
+        - hits:      Number of lookups that found their entry
+        - misses:    Number of lookups that did not
+        '''
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, graph: "Graph", seed=None) -> str:
+        '''
+        Hash of the nodes and the adjacency of the graph, in order, of its starting node and of the seed.
+        Positions do not change the tree so they are not part of it. A seed of None is a key of its own:
+        the first random tree stored for the graph is reused whatever the state of np.random.
+        '''
+        structure = repr((graph.start, seed, [(n, list(neighbors)) for n, neighbors in graph.g.adjacency()]))
+        return hashlib.sha1(structure.encode()).hexdigest()
+
+    def file(self, key: str) -> str:
+        return os.path.join(self.path, f'{key}.gsst')
+
+    def get(self, graph: "Graph", seed=None) -> tuple:
+        '''
+        Parent array, preorder, labels and non-tree edges B of the tree stored for the graph and the seed,
+        as taken by Graph.set_spanning_tree, or None if there is none.
+        '''
+        path = self.file(self.key(graph, seed))
+        try:
+            _, arrays, _ = map_arrays(path)
+            os.utime(path) # most recently used
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        nodes = list(graph.g.nodes())
+        B = [(nodes[a], nodes[b]) for a, b in arrays['B'].tolist()]
+        return arrays['parent'], arrays['order'], arrays['labels'], B
+
+    def put(self, graph: "Graph", seed, parent, order, labels, mu: int) -> None:
+        '''
+        Stores the spanning tree the graph was just given from the parent array and the preorder,
+        with its labels and number of searchers mu as returned by label_tree.
+        The file is written under a temporary name and renamed, so processes sharing the cache never read a partial entry.
+        '''
+        os.makedirs(self.path, exist_ok=True)
+        nodes = list(graph.g.nodes())
+        index = {n: i for i, n in enumerate(nodes)}
+        dtype = np.int32 if len(nodes) < 2**31 else np.int64
+        arrays = {
+            'parent': np.asarray(parent, dtype=dtype),
+            'order': np.asarray(order, dtype=dtype),
+            'labels': labels.astype(dtype),
+            'B': np.array([(index[a], index[b]) for a, b in graph.B], dtype=dtype).reshape(-1, 2),
+        }
+        path = self.file(self.key(graph, seed))
+        temporary = f'{path}.{os.getpid()}.tmp'
+        write_arrays(temporary, arrays, {'mu': int(mu), 'seed': seed})
+        os.replace(temporary, path)
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        '''
+        Last use time, size and path of every entry, least recently used first.
+        '''
+        if not os.path.isdir(self.path):
+            return []
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.gsst'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> None:
+        '''
+        Removes the least recently used entries until the others take at most max_bytes.
+        '''
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError: # removed by another process
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, path in self.entries():
+            os.remove(path)